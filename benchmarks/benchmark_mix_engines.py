@@ -0,0 +1,176 @@
+"""Compare the 'pillow' and 'numpy' engines of mix_images.
+
+Usage:
+
+    python benchmarks/benchmark_mix_engines.py [options]
+
+Two noise images are mixed by mix_images with each engine, at
+full opacity and at the given opacity. The same images, as
+NumPy arrays, are also mixed with numpy_engine.blend_arrays()
+into an output array allocated beforehand (out=...), which is
+what pipelines keeping arrays between steps pay, without the
+conversions from and to images. The best time of several runs
+is reported, and the results are checked to be identical.
+"""
+
+### standard library imports
+
+import sys
+
+from time import perf_counter
+
+from pathlib import Path
+
+from argparse import ArgumentParser
+
+
+### third-party imports
+
+import numpy
+
+from PIL.Image import effect_noise, merge
+
+
+### make the node packs importable when the script is run
+### from anywhere
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image.mix_images.__main__ import mix_images
+
+from image.mix_images.numpy_engine import blend_arrays
+
+
+def make_noise_image(size, sigma):
+    """Return RGB image with noise in each band."""
+    return merge(
+             'RGB',
+             [effect_noise(size, sigma + band * 8) for band in range(3)],
+           )
+
+
+def time_function(function, repeat):
+    """Return best time of repeated calls to function, in seconds."""
+    times = []
+
+    for _ in range(repeat):
+
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+
+    parser.add_argument(
+      '--size', type=int, nargs=2, default=(4096, 4096),
+      metavar=('WIDTH', 'HEIGHT'), help="size of the images mixed",
+    )
+
+    parser.add_argument(
+      '--operations', nargs='+',
+      default=('add', 'multiply', 'screen', 'soft_light', 'overlay'),
+      help="operations measured",
+    )
+
+    parser.add_argument(
+      '--opacity', type=float, default=0.5,
+      help="opacity measured besides full opacity",
+    )
+
+    parser.add_argument(
+      '--repeat', type=int, default=3,
+      help="number of runs of each case; the best one counts",
+    )
+
+    arguments = parser.parse_args()
+
+    size = tuple(arguments.size)
+
+    image1 = make_noise_image(size, 40)
+    image2 = make_noise_image(size, 60)
+
+    array1 = numpy.asarray(image1)
+    array2 = numpy.asarray(image2)
+    out = numpy.empty_like(array1)
+
+    opacities = (1.0, arguments.opacity)
+
+    columns = [
+      (f"{engine} {opacity:g}", engine, opacity)
+      for engine in ('pillow', 'numpy', 'arrays')
+      for opacity in opacities
+    ]
+
+    print(
+      f"{size[0]}x{size[1]} RGB, best of {arguments.repeat},"
+      " seconds per call"
+    )
+
+    print(
+      f"{'operation':<12}"
+      + ''.join(f"{label:>14}" for label, _, _ in columns)
+    )
+
+    for operation_name in arguments.operations:
+
+        times = []
+        results = {}
+
+        for label, engine, opacity in columns:
+
+            if engine == 'arrays':
+
+                def mix():
+                    return blend_arrays(
+                             array1,
+                             array2,
+                             operation_name,
+                             opacity,
+                             out=out,
+                           )
+
+            else:
+
+                def mix():
+                    return mix_images(
+                             image1,
+                             image2,
+                             operation_name,
+                             0,
+                             opacity,
+                             engine,
+                           )
+
+            times.append(time_function(mix, arguments.repeat))
+
+            result = mix()
+
+            results.setdefault(opacity, []).append(
+              result.tobytes()
+              if engine == 'arrays'
+              else numpy.asarray(result).tobytes()
+            )
+
+        ## every engine must give the same result for each opacity
+
+        for opacity, result_bytes in results.items():
+
+            if len(set(result_bytes)) > 1:
+
+                sys.exit(
+                  f"error: engines differ for {operation_name}"
+                  f" at opacity {opacity:g}"
+                )
+
+        print(
+          f"{operation_name:<12}"
+          + ''.join(f"{seconds:14.3f}" for seconds in times)
+        )
+
+
+if __name__ == '__main__':
+    main()
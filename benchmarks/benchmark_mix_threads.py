@@ -0,0 +1,161 @@
+"""Measure how mix_images scales with the number of threads.
+
+Usage:
+
+    python benchmarks/benchmark_mix_threads.py [options]
+
+Two noise images are mixed by mix_images with 0 threads (the
+whole images at once, through ImageChops) and with 1, 2, 4 and
+8 threads (strip by strip, through NumPy when it's installed,
+since ImageChops holds the GIL). Mixing with a symbolic solid
+color image (a lookup table applied with Image.point()) is
+measured as well. The best time of several runs is reported,
+along with the number of cores, since threads can't be faster
+than a single one on a single core machine. The results with
+threads are checked to be the same as without them.
+"""
+
+### standard library imports
+
+import sys
+
+from os import cpu_count
+
+from time import perf_counter
+
+from pathlib import Path
+
+from argparse import ArgumentParser
+
+
+### third-party import
+from PIL.Image import effect_noise, merge
+
+
+### make the node packs importable when the script is run
+### from anywhere
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image.mix_images.__main__ import mix_images
+
+from image.mix_images.numpy_engine import can_mix_with_numpy
+
+from image.new_color_image.constant import ConstantImage
+
+
+### numbers of threads measured
+THREAD_COUNTS = (1, 2, 4, 8)
+
+
+def make_noise_image(size, sigma):
+    """Return RGB image with noise in each band."""
+    return merge(
+             'RGB',
+             [effect_noise(size, sigma + band * 8) for band in range(3)],
+           )
+
+
+def time_function(function, repeat):
+    """Return best time of repeated calls to function, in seconds."""
+    times = []
+
+    for _ in range(repeat):
+
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+
+    parser.add_argument(
+      '--size', type=int, nargs=2, default=(4096, 4096),
+      metavar=('WIDTH', 'HEIGHT'), help="size of the images mixed",
+    )
+
+    parser.add_argument(
+      '--operations', nargs='+', default=('multiply', 'soft_light'),
+      help="operations measured",
+    )
+
+    parser.add_argument(
+      '--repeat', type=int, default=3,
+      help="number of runs of each case; the best one counts",
+    )
+
+    arguments = parser.parse_args()
+
+    size = tuple(arguments.size)
+
+    image1 = make_noise_image(size, 40)
+    image2 = make_noise_image(size, 60)
+
+    tint = ConstantImage('RGB', size, (200, 120, 40))
+
+    strip_engine = (
+      'NumPy'
+      if can_mix_with_numpy(image1, image2)
+      else 'ImageChops'
+    )
+
+    print(
+      f"{size[0]}x{size[1]} RGB, {cpu_count()} cores,"
+      f" best of {arguments.repeat}, seconds per call;"
+      f" strips mixed with {strip_engine}"
+    )
+
+    print(
+      f"{'operation':<18}{'whole':>8}"
+      + ''.join(f"{f'{count} thr':>8}" for count in THREAD_COUNTS)
+    )
+
+    cases = [
+      (operation_name, image1, image2)
+      for operation_name in arguments.operations
+    ] + [
+      (f"{operation_name} (tint)", image1, tint)
+      for operation_name in arguments.operations[:1]
+    ]
+
+    for label, first_image, second_image in cases:
+
+        operation_name = label.split()[0]
+
+        expected_bytes = None
+
+        times = []
+
+        for threads in (0, *THREAD_COUNTS):
+
+            def mix():
+                return mix_images(
+                         first_image,
+                         second_image,
+                         operation_name,
+                         threads,
+                       )
+
+            times.append(time_function(mix, arguments.repeat))
+
+            ## results with threads must be the ones without them
+
+            result_bytes = mix().tobytes()
+
+            if expected_bytes is None:
+                expected_bytes = result_bytes
+
+            elif result_bytes != expected_bytes:
+                sys.exit(f"error: {label} differs with {threads} threads")
+
+        print(
+          f"{label:<18}"
+          + ''.join(f"{seconds:8.3f}" for seconds in times)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Compare the multi-threaded PNG writer with Image.save().
+
+Usage:
+
+    python benchmarks/benchmark_png_writer.py [options]
+
+An RGB image mixing smooth gradients and noise (so it
+compresses neither trivially nor poorly) is saved in memory
+with save_image.pngwriter.write_png() and with Pillow's own
+PNG encoder. The best time of several runs and the size of the
+output are reported for each, and the files written are checked
+to decode to the same pixels.
+"""
+
+### standard library imports
+
+import sys
+
+from io import BytesIO
+
+from time import perf_counter
+
+from pathlib import Path
+
+from argparse import ArgumentParser
+
+
+### third-party imports
+
+from PIL.Image import (
+                 Resampling,
+                 effect_noise,
+                 linear_gradient,
+                 merge,
+                 open as pil_open_image,
+                 radial_gradient,
+               )
+
+from PIL.ImageChops import add
+
+
+### make the node packs importable when the script is run
+### from anywhere
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image.save_image.pngwriter import write_png
+
+
+def make_test_image(size):
+    """Return RGB image with gradients and some noise."""
+    noise = effect_noise(size, 24)
+
+    bands = [
+      add(
+        gradient.resize(size, Resampling.BILINEAR),
+        noise,
+        scale=1.0,
+        offset=-64,
+      )
+      for gradient in (
+        linear_gradient('L'),
+        radial_gradient('L'),
+        linear_gradient('L').rotate(90),
+      )
+    ]
+
+    return merge('RGB', bands)
+
+
+def time_function(function, repeat):
+    """Return best time of repeated calls to function, in seconds."""
+    times = []
+
+    for _ in range(repeat):
+
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+
+    parser.add_argument(
+      '--size', type=int, nargs=2, default=(4000, 3000),
+      metavar=('WIDTH', 'HEIGHT'), help="size of the image saved",
+    )
+
+    parser.add_argument(
+      '--level', type=int, default=6,
+      help="zlib compression level, from 0 to 9",
+    )
+
+    parser.add_argument(
+      '--threads', type=int, default=None,
+      help="threads used by write_png(); defaults to the cores",
+    )
+
+    parser.add_argument(
+      '--repeat', type=int, default=3,
+      help="number of runs of each writer; the best one counts",
+    )
+
+    arguments = parser.parse_args()
+
+    image = make_test_image(tuple(arguments.size))
+
+    ### each writer saves to a new in-memory file, so only the
+    ### encoding is measured
+
+    outputs = {}
+
+    def save_with_pillow():
+        outputs['Image.save'] = file = BytesIO()
+        image.save(file, 'PNG', compress_level=arguments.level)
+
+    def save_with_write_png():
+        outputs['write_png'] = file = BytesIO()
+        write_png(image, file, arguments.level, arguments.threads)
+
+    print(
+      f"{image.width}x{image.height} {image.mode},"
+      f" compress_level={arguments.level},"
+      f" best of {arguments.repeat}"
+    )
+
+    results = {
+      name: time_function(function, arguments.repeat)
+      for name, function in (
+        ('Image.save', save_with_pillow),
+        ('write_png', save_with_write_png),
+      )
+    }
+
+    for name, seconds in results.items():
+
+        print(
+          f"{name:>10}: {seconds:7.3f} s,"
+          f" {outputs[name].getbuffer().nbytes:>11,} bytes"
+        )
+
+    print(
+      f"   speedup: {results['Image.save'] / results['write_png']:.2f}x"
+    )
+
+    ### both files must hold the same pixels
+
+    decoded_images = [
+      pil_open_image(BytesIO(file.getvalue())).tobytes()
+      for file in outputs.values()
+    ]
+
+    if decoded_images[0] != decoded_images[1]:
+        sys.exit("error: the files written hold different pixels")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+
+### third-party imports
+
+from PIL.Image import Image, blend
+
+
+### local imports
+
+from ..new_color_image.constant import ConstantImage
+
+from ..mix_images.operations import BLEND_OPERATION_MAP
+
+from ..mix_images.lookup import can_use_lookup, mix_with_lookup
+
+from ..mix_images.tiling import map_in_strips
+
+
+### support function
+
+def get_layer_data(layer):
+    """Return (image, operation, opacity) from layer.
+
+    The layer is a tuple or list with an image, the name of an
+    operation and, optionally, its opacity (1.0 by default),
+    which is clamped between 0.0 and 1.0.
+    """
+    image, operation_name, *rest = layer
+
+    opacity = min(max(float(rest[0]), 0.0), 1.0) if rest else 1.0
+
+    return image, BLEND_OPERATION_MAP[operation_name], opacity
+
+
+### function definition
+
+def blend_chain(
+
+      base: Image,
+
+      layers: list,
+
+      threads: 'natural_number' = 0,
+
+    ) -> [
+      {'name': 'image', 'type': Image},
+    ]:
+    """Return result of mixing layers over base, in a single pass.
+
+    Gives the same result as a chain of mix_images nodes, each
+    mixing the result of the previous one with the image of a
+    layer, followed by Image.blend() with the opacity of the
+    layer. Instead of allocating a full size image for each
+    step, though, the images are split in horizontal strips
+    small enough to stay in the CPU caches, and all layers are
+    applied to each strip before moving on to the next one, so
+    only the output is allocated at full size.
+
+    Parameters
+    ==========
+
+    base (PIL.Image.Image)
+        bottom image of the stack.
+    layers (list)
+        layers mixed over base, from the bottom to the top. Each
+        one is a tuple (or list) with an image, the name of an
+        operation of the mix_images node and, optionally, the
+        opacity of the layer, from 0.0 (no effect) to 1.0 (the
+        default). All images must have the same mode as base.
+        Symbolic solid color images (see new_color_image) are
+        mixed through lookup tables, without being allocated.
+    threads (natural number)
+        number of threads processing strips; if 0, a single
+        thread is used. Note that ImageChops operations only
+        run in parallel on free-threaded Python builds (see
+        mix_images).
+
+    Returns
+    =======
+    The resulting image, which has the size of the region all
+    images have in common.
+    """
+    layers = [
+      layer_data
+      for layer_data in map(get_layer_data, layers)
+      if layer_data[2]
+    ]
+
+    ### the result has the size of the region all images have
+    ### in common, like results of ImageChops operations
+
+    images = [base] + [image for image, _, _ in layers]
+
+    size = (
+      min(image.width for image in images),
+      min(image.height for image in images),
+    )
+
+    ### only images which aren't mixed through lookup tables are
+    ### split in strips
+
+    is_constant_flags = [
+      isinstance(image, ConstantImage)
+      and can_use_lookup(base, image)
+      for image, _, _ in layers
+    ]
+
+    strip_images = [base] + [
+      image
+      for (image, _, _), is_constant in zip(layers, is_constant_flags)
+      if not is_constant
+    ]
+
+    def mix_strips(base_strip, *layer_strips):
+
+        result = base_strip
+        layer_strips = iter(layer_strips)
+
+        for (image, operation, opacity), is_constant in zip(
+          layers,
+          is_constant_flags,
+        ):
+
+            mixed = (
+              mix_with_lookup(operation, result, image)
+              if is_constant
+              else operation(result, next(layer_strips))
+            )
+
+            result = (
+              mixed
+              if opacity == 1.0
+              else blend(result, mixed, opacity)
+            )
+
+        return result
+
+    return map_in_strips(mix_strips, strip_images, size, threads or 1)
+
+main_callable = blend_chain
@@ -0,0 +1,125 @@
+
+### standard library imports
+
+from io import BytesIO
+
+from threading import local
+
+
+### third-party import
+from PIL.Image import Image
+
+
+### local import
+from ..save_image.saving import encode
+
+
+### buffers reused by each thread
+THREAD_DATA = local()
+
+
+### support function
+
+def get_buffer():
+    """Return empty buffer, reusing the last one if possible.
+
+    The last buffer used by the current thread is reused
+    (keeping its memory allocated) unless a view of its data
+    returned by encode_image is still in use, in which case
+    it can't be changed and a new buffer is created instead.
+    """
+    buffer = getattr(THREAD_DATA, 'buffer', None)
+
+    if buffer is not None:
+
+        buffer.seek(0)
+
+        ## writing fails if views of the buffer still exist
+
+        try:
+            buffer.write(b'')
+
+        except BufferError:
+            buffer = None
+
+    if buffer is None:
+
+        buffer = BytesIO()
+        THREAD_DATA.buffer = buffer
+
+    return buffer
+
+
+### function definition
+
+def encode_image(
+
+      image  : Image,
+      format : 'python_literal' = 'PNG',
+
+      png_threads: 'natural_number' = 0,
+
+      time_budget: float = 0.0,
+
+      size_budget: 'natural_number' = 0,
+
+    ) -> [
+
+      {'name' : 'data',   'type': memoryview},
+      {'name' : 'format', 'type': str},
+
+    ]:
+    """Return image encoded in given format, kept in memory.
+
+    Works like the save_image node, but instead of writing the
+    encoded image to a file, it is written to an in-memory
+    buffer and returned as a memoryview of such buffer, so it
+    can be hashed, written to archives or sent through sockets
+    without touching the disk or copying the data.
+
+    The buffer is reused by later calls in the same thread,
+    unless the memoryview (or views derived from it) is still
+    in use. Call memoryview.release() (or let it be garbage
+    collected) once done with the data, or use bytes(data)
+    to keep a copy of it.
+
+    Parameters
+    ==========
+
+    image (PIL.Image.Image)
+        image to be encoded.
+    format (string)
+        format to use (like 'PNG' or 'JPEG').
+    png_threads, time_budget, size_budget
+        same as in the save_image node.
+
+    Returns
+    =======
+    A dict with the memoryview of the encoded bytes and the
+    name of the format used, in uppercase.
+    """
+    format_name = format.upper()
+
+    buffer = get_buffer()
+
+    encode(
+      image,
+      buffer,
+      format_name,
+      format_name,
+      png_threads,
+      time_budget,
+      size_budget,
+    )
+
+    ### leave out any bytes left in the buffer from previous
+    ### (longer) encodings
+
+    data = buffer.getbuffer()[:buffer.tell()]
+
+    return {
+      'data'   : data,
+      'format' : format_name,
+    }
+
+main_callable = encode_image
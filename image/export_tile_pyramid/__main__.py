@@ -0,0 +1,340 @@
+
+### standard library imports
+
+from os import cpu_count
+
+from math import ceil, log2
+
+from json import dumps
+
+from pathlib import Path
+
+from collections import deque
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+### third-party import
+from PIL.Image import Image
+
+
+### local imports
+
+from ..save_image.store import link_file
+
+from .tiling import get_uniform_color, encode_tiles
+
+
+### file extension used for each format
+EXTENSIONS = {
+  'PNG'  : 'png',
+  'JPEG' : 'jpg',
+  'WEBP' : 'webp',
+}
+
+### number of tiles sent to a worker process at once
+TILES_PER_BATCH = 16
+
+### template of DeepZoom descriptor file
+
+DZI_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008"
+  Format="{extension}" Overlap="0" TileSize="{tile_size}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+### support function
+
+def convert_for_pyramid(image, format):
+    """Return image in a mode supported by reduce() and format.
+
+    Image.reduce() can't average palette, bilevel or 16-bit
+    pixels. Palette images are converted to RGB (RGBA if they
+    have transparency) and bilevel ones to L. 16-bit images
+    are converted to 32-bit integers (I), which are stored as
+    16-bit PNG tiles, or scaled to 8-bit (L) for other formats.
+    JPEG tiles are always RGB.
+    """
+    mode = image.mode
+
+    if mode in ('P', 'PA'):
+
+        image = image.convert(
+                  'RGBA'
+                  if mode == 'PA' or 'transparency' in image.info
+                  else 'RGB'
+                )
+
+    elif mode == '1':
+        image = image.convert('L')
+
+    elif mode.startswith('I;16'):
+
+        image = image.convert('I')
+
+        if format != 'PNG':
+            image = image.point(lambda value: value * (1 / 257)).convert('L')
+
+    if format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    return image
+
+
+### function definition
+
+def export_tile_pyramid(
+
+      image: Image,
+
+      directory: str = '.',
+
+      name: str = 'image',
+
+      layout: {
+        'widget_name': 'option_menu',
+        'widget_kwargs': {
+          'options': ('deepzoom', 'xyz'),
+        },
+        'type': str,
+      } = 'deepzoom',
+
+      tile_size: {
+        'widget_name': 'option_menu',
+        'widget_kwargs': {
+          'options': (256, 512),
+        },
+        'type': int,
+      } = 256,
+
+      format: {
+        'widget_name': 'option_menu',
+        'widget_kwargs': {
+          'options': tuple(EXTENSIONS),
+        },
+        'type': str,
+      } = 'PNG',
+
+      max_workers: 'natural_number' = 0,
+
+    ) -> [
+
+      {'name' : 'level_count',   'type': int},
+      {'name' : 'tile_count',    'type': int},
+      {'name' : 'uniform_count', 'type': int},
+
+    ]:
+    """Export image as a multi-resolution pyramid of tiles.
+
+    The full size image is the highest level of the pyramid.
+    Each level below is half the size of the level above it,
+    obtained by box reduction (Image.reduce(2)), down to the
+    lowest level. Levels are processed one at a time, from the
+    highest one, so at most two levels are kept in memory.
+    Tiles are encoded by a pool of processes; the number of
+    tiles waiting to be encoded is bounded, so memory use
+    doesn't grow with the number of tiles.
+
+    Tiles whose pixels all have the same color are only encoded
+    once for each color and size; the other ones are written
+    as links to that file (reflinks or hard links, when the
+    file system supports them, or copies otherwise), so every
+    tile exists for viewers and static servers. They are also
+    listed along with their colors in the
+    '<name>_uniform_tiles.json' file, which maps
+    '<level>/<column>/<row>' to the color, so that servers can
+    produce them without reading the files.
+
+    Parameters
+    ==========
+
+    image (PIL.Image.Image)
+        image to be exported.
+    directory (string)
+        directory where files are created; it is created if
+        it doesn't exist.
+    name (string)
+        base name of created files.
+    layout (string)
+        either 'deepzoom', to create the '<name>.dzi'
+        descriptor and '<name>_files/<level>/<column>_<row>'
+        tiles, where level 0 is 1x1 pixel, or 'xyz', to create
+        '<name>/<zoom>/<column>/<row>' tiles, where zoom 0 is
+        the level fitting in a single tile.
+    tile_size (integer)
+        width and height of tiles (tiles in the right and
+        bottom edges may be smaller).
+    format (string)
+        format of the tiles. Images are converted to RGB when
+        exported to JPEG; palette, bilevel and 16-bit images
+        are converted as well (see convert_for_pyramid()).
+    max_workers (natural number)
+        number of processes encoding tiles. If 0, the number of
+        cores available is used.
+
+    Returns
+    =======
+    A dict with the number of levels, the number of tiles
+    encoded and the number of uniform tiles (all of which are
+    written, but only one per color and size is encoded).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    extension = EXTENSIONS[format]
+
+    image = convert_for_pyramid(image, format)
+
+    width, height = image.size
+
+    ### calculate the number of the highest level and define
+    ### where tiles are written, depending on the layout
+
+    if layout == 'deepzoom':
+
+        top_level = ceil(log2(max(width, height, 1)))
+        bottom_level = 0
+
+        tiles_directory = directory / f'{name}_files'
+
+        def get_tile_path(level, column, row):
+            return (
+              tiles_directory / str(level) / f'{column}_{row}.{extension}'
+            )
+
+        (directory / f'{name}.dzi').write_text(
+          DZI_TEMPLATE.format(
+            extension=extension,
+            tile_size=tile_size,
+            width=width,
+            height=height,
+          )
+        )
+
+    else:
+
+        top_level = max(ceil(log2(max(width, height) / tile_size)), 0)
+        bottom_level = 0
+
+        tiles_directory = directory / name
+
+        def get_tile_path(level, column, row):
+            return (
+              tiles_directory / str(level) / str(column) / f'{row}.{extension}'
+            )
+
+    ### process each level, from the highest one, submitting
+    ### batches of tiles to be encoded
+
+    tile_count = 0
+    uniform_tiles = {}
+    uniform_tile_paths = {}
+
+    max_workers = max_workers or cpu_count() or 1
+    max_pending = 2 * max_workers
+
+    pending_futures = deque()
+    level_image = image
+
+    with ProcessPoolExecutor(max_workers) as executor:
+
+        for level in range(top_level, bottom_level - 1, -1):
+
+            level_width, level_height = level_image.size
+            batch = []
+
+            for column in range(ceil(level_width / tile_size)):
+
+                for row in range(ceil(level_height / tile_size)):
+
+                    left = column * tile_size
+                    upper = row * tile_size
+
+                    tile = level_image.crop(
+                             (
+                               left,
+                               upper,
+                               min(left + tile_size, level_width),
+                               min(upper + tile_size, level_height),
+                             )
+                           )
+
+                    tile_path = get_tile_path(level, column, row)
+                    tile_path.parent.mkdir(parents=True, exist_ok=True)
+
+                    ## if the tile is uniform, record its color; only
+                    ## the first tile of each color and size is
+                    ## encoded, the others are linked to it later
+
+                    color = get_uniform_color(tile)
+
+                    if color is not None:
+
+                        uniform_tiles[f'{level}/{column}/{row}'] = color
+
+                        uniform_key = (color, tile.size)
+
+                        if uniform_key in uniform_tile_paths:
+
+                            uniform_tile_paths[uniform_key].append(tile_path)
+                            continue
+
+                        uniform_tile_paths[uniform_key] = [tile_path]
+
+                    ## add the tile to the batch of tiles to be encoded
+
+                    batch.append((tile, tile_path))
+                    tile_count += 1
+
+                    if len(batch) == TILES_PER_BATCH:
+
+                        pending_futures.append(
+                          executor.submit(encode_tiles, batch, format)
+                        )
+
+                        batch = []
+
+                    ## if too many batches are pending, wait for the
+                    ## oldest one (and raise its error, if any)
+
+                    while len(pending_futures) > max_pending:
+                        pending_futures.popleft().result()
+
+            if batch:
+
+                pending_futures.append(
+                  executor.submit(encode_tiles, batch, format)
+                )
+
+            ## produce the next level
+
+            if level > bottom_level:
+                level_image = level_image.reduce(2)
+
+        while pending_futures:
+            pending_futures.popleft().result()
+
+    ### write the uniform tiles not encoded, as links to (or copies
+    ### of) the encoded tile with the same color and size
+
+    for encoded_path, *other_paths in uniform_tile_paths.values():
+
+        for tile_path in other_paths:
+            link_file(encoded_path, tile_path)
+
+    ### record uniform tiles
+
+    (directory / f'{name}_uniform_tiles.json').write_text(
+      dumps(uniform_tiles)
+    )
+
+    return {
+      'level_count'   : top_level - bottom_level + 1,
+      'tile_count'    : tile_count,
+      'uniform_count' : len(uniform_tiles),
+    }
+
+main_callable = export_tile_pyramid
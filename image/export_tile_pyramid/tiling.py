@@ -0,0 +1,42 @@
+"""Facility for encoding tiles in worker processes.
+
+Functions in this module are run by a process pool, so they
+must be importable by the worker processes.
+"""
+
+
+def get_uniform_color(tile):
+    """Return color of tile if all pixels are equal, else None."""
+    extrema = tile.getextrema()
+
+    ## single-band images give a single (min, max) pair
+
+    if not isinstance(extrema[0], tuple):
+        extrema = (extrema,)
+
+    if all(minimum == maximum for minimum, maximum in extrema):
+        return tuple(minimum for minimum, _ in extrema)
+
+    return None
+
+
+def encode_tiles(tiles, format):
+    """Encode each tile to its path.
+
+    Parameters
+    ==========
+
+    tiles (list)
+        list of (image, path) pairs.
+    format (string)
+        format used to save the tiles.
+    """
+    for image, path in tiles:
+
+        ## tiles of 16-bit images are reduced as 32-bit integers,
+        ## but stored as 16-bit values
+
+        if image.mode == 'I':
+            image = image.convert('I;16')
+
+        image.save(path, format=format)
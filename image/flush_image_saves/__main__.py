@@ -0,0 +1,27 @@
+
+### local import
+from ..save_image.writer import BACKGROUND_WRITER
+
+
+### function definition
+
+def flush_image_saves(value=None) -> [
+      {'name' : 'value', 'type': object},
+    ]:
+    """Wait for background saves to finish, then return value.
+
+    Waits for all images being saved in the background by the
+    save_image node to be saved and raises the error of any
+    save that failed.
+
+    Parameters
+    ==========
+
+    value (any Python object)
+        returned as is; it can be used to make this node run
+        after the nodes whose output it receives.
+    """
+    BACKGROUND_WRITER.flush()
+    return value
+
+main_callable = flush_image_saves
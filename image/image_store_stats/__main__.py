@@ -0,0 +1,50 @@
+
+### local import
+from ..save_image.store import get_stats
+
+
+### function definition
+
+def image_store_stats(store_directory: str = '.') -> [
+      {'name' : 'saves',           'type': int},
+      {'name' : 'blobs_stored',    'type': int},
+      {'name' : 'bytes_requested', 'type': int},
+      {'name' : 'bytes_stored',    'type': int},
+      {'name' : 'bytes_saved',     'type': int},
+      {'name' : 'bytes_copied',    'type': int},
+      {'name' : 'saved_ratio',     'type': float},
+    ]:
+    """Return statistics of content-addressed image store.
+
+    See the store_directory parameter of the save_image node.
+
+    Parameters
+    ==========
+
+    store_directory (string)
+        directory of the store.
+
+    Returns
+    =======
+    A dict with the number of files saved to the store and
+    how many of them were new (and thus stored), the number of
+    bytes of all files saved, of the files stored, of the ones
+    which weren't stored because identical files were already
+    there and their paths share storage with them (reflinks or
+    hard links), and of the ones whose paths got copies of the
+    stored files (on other file systems than the store), which
+    take disk space in addition to the stored files. Also the
+    ratio of bytes saved to the bytes of all files (0.0 if no
+    files were saved).
+    """
+    stats = get_stats(store_directory)
+
+    stats['saved_ratio'] = (
+      stats['bytes_saved'] / stats['bytes_requested']
+      if stats['bytes_requested']
+      else 0.0
+    )
+
+    return stats
+
+main_callable = image_store_stats
@@ -1,34 +1,17 @@
 
-### third-party imports
-
-from PIL.Image import Image
-
-from PIL.ImageChops import (
-                      add,
-                      darker,
-                      difference,
-                      lighter,
-                      multiply,
-                      soft_light,
-                      hard_light,
-                      overlay,
-                      screen,
-                      subtract,
-                    )
-
-
-BLEND_OPERATION_MAP = {
-  'add'             : add,
-  'darker'          : darker,
-  'difference'      : difference,
-  'lighter'         : lighter,
-  'multiply'        : multiply,
-  'soft_light'      : soft_light,
-  'hard_light'      : hard_light,
-  'overlay'         : overlay,
-  'screen'          : screen,
-  'subtract'        : subtract,
-}
+### third-party import
+from PIL.Image import Image, blend
+
+
+### local imports
+
+from .operations import BLEND_OPERATION_MAP
+
+from .lookup import can_use_lookup, mix_with_lookup
+
+from .tiling import map_in_strips
+
+from .numpy_engine import can_mix_with_numpy, mix_with_numpy
 
 
 def mix_images(
@@ -45,11 +28,130 @@ def mix_images(
         'type': str,
       } = 'multiply',
 
+      threads: 'natural_number' = 0,
+
+      opacity: float = 1.0,
+
+      engine : {
+        'widget_name': 'option_menu',
+        'widget_kwargs': {
+          'options': ('pillow', 'numpy'),
+        },
+        'type': str,
+      } = 'pillow',
+
     ) -> [
       {'name': 'image', 'type': Image},
     ]:
-    """"""
+    """Return result of mixing images with operation.
+
+    Operations are the ones from PIL.ImageChops with the same
+    names.
+
+    If either image is a solid color image created with the
+    symbolic option of the new_color_image node, the operation
+    is applied as a lookup table to the other image, which
+    gives the same result while reading only one image. If
+    both are, the result is also a symbolic solid color image.
+
+    Parameters
+    ==========
+
+    image1, image2 (PIL.Image.Image)
+        images to be mixed; they must have the same mode. The
+        result has the size of the region they have in common.
+    operation_name (string)
+        name of the operation.
+    threads (natural number)
+        if higher than 0, the images are split in horizontal
+        strips which are mixed by this many threads and written
+        into an output allocated upfront. ImageChops operations
+        hold the GIL (except on free-threaded Python builds), so
+        when NumPy is installed and supports the mode, strips
+        are mixed with the 'numpy' engine instead, which gives
+        the same results and releases the GIL. Mixing with
+        symbolic solid color images (lookup tables) runs in
+        parallel as well. If 0, the whole images are mixed at
+        once.
+    opacity (float)
+        from 0.0 to 1.0; the result is blended with image1 like
+        Image.blend(image1, result, opacity) would, so lower
+        values make the operation less pronounced.
+    engine (string)
+        'pillow' (the default) uses PIL.ImageChops, applying
+        the opacity with Image.blend() afterwards (except for
+        symbolic solid color images, for which it is applied
+        within the lookup table). 'numpy' requires NumPy and
+        computes the operation and the opacity together, in
+        small blocks of rows, giving exactly the same results
+        (and running in parallel when threads are used).
+        It also supports I;16 images, which ImageChops doesn't.
+        See numpy_engine.blend_arrays() for mixing arrays,
+        optionally into an existing output array.
+    """
+    opacity = min(max(opacity, 0.0), 1.0)
+
+    if engine == 'numpy':
+
+        return mix_with_numpy(
+                 image1,
+                 image2,
+                 operation_name,
+                 opacity,
+                 threads,
+               )
+
     operation = BLEND_OPERATION_MAP[operation_name]
-    return operation(image1, image2)
+
+    if can_use_lookup(image1, image2):
+
+        return mix_with_lookup(
+                 operation,
+                 image1,
+                 image2,
+                 threads,
+                 opacity,
+               )
+
+    ### ImageChops operations hold the GIL, so threads can only
+    ### mix strips in parallel using NumPy
+
+    if threads and can_mix_with_numpy(image1, image2):
+
+        return mix_with_numpy(
+                 image1,
+                 image2,
+                 operation_name,
+                 opacity,
+                 threads,
+               )
+
+    ### if requested, apply the opacity after the operation
+
+    if opacity != 1.0:
+
+        mix = lambda image1, image2: blend(
+                                       image1,
+                                       operation(image1, image2),
+                                       opacity,
+                                     )
+
+    else:
+        mix = operation
+
+    size = (
+      min(image1.width, image2.width),
+      min(image1.height, image2.height),
+    )
+
+    if threads:
+        return map_in_strips(mix, [image1, image2], size, threads)
+
+    ### Image.blend() requires images of the same size
+
+    if opacity != 1.0 and image1.size != size:
+        image1 = image1.crop((0, 0, *size))
+
+    return mix(image1, image2)
 
 main_callable = mix_images
@@ -0,0 +1,165 @@
+"""Facility for mixing images with solid color images.
+
+When one of the images is a ConstantImage, each band of the
+result depends only on the corresponding band of the other
+image, so the operation can be applied as a lookup table with
+Image.point(), which reads a single image instead of two.
+
+The tables are obtained from the ImageChops functions
+themselves, applied once to every pair of 8-bit values, so
+results are exactly the same.
+"""
+
+### standard library import
+from functools import lru_cache
+
+
+### third-party imports
+
+from PIL.Image import (
+                 Transpose,
+                 blend,
+                 frombytes,
+                 linear_gradient,
+               )
+
+
+### local imports
+
+from ..new_color_image.constant import ConstantImage
+
+from .tiling import map_in_strips
+
+
+### modes supported, which store one 8-bit value per band
+LOOKUP_MODES = frozenset(('L', 'LA', 'RGB', 'RGBA'))
+
+
+@lru_cache(maxsize=None)
+def get_operation_table(operation):
+    """Return bytes with results of operation for 8-bit values.
+
+    The result of operation(a, b) is at index a + 256 * b.
+    """
+    ### the vertical gradient goes from 0 to 255 down the
+    ### rows, so its transposition goes from 0 to 255 along the
+    ### columns
+
+    rows = linear_gradient('L')
+    columns = rows.transpose(Transpose.TRANSPOSE)
+
+    return operation(columns, rows).tobytes()
+
+
+def blend_values(values1, values2, opacity):
+    """Return bytes with values blended like by Image.blend().
+
+    Image.blend() itself is applied to the values, so the
+    results are exactly the same.
+    """
+    size = (len(values1), 1)
+
+    return blend(
+             frombytes('L', size, bytes(values1)),
+             frombytes('L', size, bytes(values2)),
+             opacity,
+           ).tobytes()
+
+
+def can_use_lookup(image1, image2):
+    """Return True if images can be mixed with lookup tables."""
+    return (
+      (
+        isinstance(image1, ConstantImage)
+        or isinstance(image2, ConstantImage)
+      )
+      and image1.mode == image2.mode
+      and image1.mode in LOOKUP_MODES
+    )
+
+
+def mix_with_lookup(operation, image1, image2, threads=0, opacity=1.0):
+    """Return result of operation, one of images being constant.
+
+    The result is the same operation(image1, image2) gives; if
+    both images are constant, it is also a ConstantImage. If
+    threads is higher than 0, the lookup table is applied strip
+    by strip by that many threads.
+
+    If opacity is lower than 1.0, the result is the same given
+    by Image.blend(image1, result, opacity), which is folded
+    into the lookup table, so no extra pass is needed.
+    """
+    table = get_operation_table(operation)
+
+    ### the result has the size of the intersection of the
+    ### images, like in ImageChops
+
+    size = (
+      min(image1.width, image2.width),
+      min(image1.height, image2.height),
+    )
+
+    if isinstance(image1, ConstantImage):
+
+        if isinstance(image2, ConstantImage):
+
+            color = bytes(
+                      table[value1 + 256 * value2]
+                      for value1, value2 in zip(image1.color, image2.color)
+                    )
+
+            if opacity != 1.0:
+                color = blend_values(image1.color, color, opacity)
+
+            return ConstantImage(image1.mode, size, tuple(color))
+
+        ## for each band, the table holds the results for the
+        ## constant value and all values of image2, which are
+        ## blended with the constant value
+
+        lut = b''.join(
+                table[value1::256]
+                for value1 in image1.color
+              )
+
+        base_values = b''.join(
+                        bytes((value1,)) * 256
+                        for value1 in image1.color
+                      )
+
+        image = image2
+
+    else:
+
+        ## for each band, the table holds the results for all
+        ## values of image1 and the constant value, which are
+        ## blended with the values of image1
+
+        lut = b''.join(
+                table[256 * value2 : 256 * (value2 + 1)]
+                for value2 in image2.color
+              )
+
+        base_values = bytes(range(256)) * len(image2.color)
+
+        image = image1
+
+    if opacity != 1.0:
+        lut = blend_values(base_values, lut, opacity)
+
+    lut = list(lut)
+
+    if threads:
+
+        return map_in_strips(
+                 lambda strip: strip.point(lut),
+                 [image],
+                 size,
+                 threads,
+               )
+
+    if image.size != size:
+        image = image.crop((0, 0, *size))
+
+    return image.point(lut)
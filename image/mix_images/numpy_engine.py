@@ -0,0 +1,377 @@
+"""Facility for mixing images with NumPy.
+
+Implements the operations of PIL.ImageChops for arrays of 8-bit
+and 16-bit unsigned integers, with an opacity applied in the
+same pass and an optional output array. For 8-bit values, the
+results are exactly the ones given by ImageChops and, when an
+opacity is used, by Image.blend(); for 16-bit values, the same
+formulas are used, scaled to the larger range (ImageChops
+doesn't support 16-bit images).
+
+NumPy is an optional dependency; it is only imported when this
+engine is used.
+"""
+
+### third-party imports
+
+from PIL.Image import fromarray
+
+from PIL.ImageMode import getmode
+
+
+### local imports
+
+from ..new_color_image.constant import ConstantImage
+
+from .tiling import run_in_strips
+
+
+### number of bytes of each input processed at once; blocks
+### are kept small so their temporary arrays, which use wider
+### integers, stay in the CPU caches
+BLOCK_BYTES = 1 << 18
+
+### modes supported when mixing images
+NUMPY_MODES = frozenset(('L', 'LA', 'RGB', 'RGBA', 'I;16'))
+
+
+def import_numpy():
+    """Return numpy module, raising an explanatory error if missing."""
+    try:
+        import numpy
+
+    except ImportError as err:
+
+        raise ImportError(
+          "the 'numpy' engine requires NumPy, which isn't installed"
+        ) from err
+
+    return numpy
+
+
+### operations; each one receives arrays of signed integers
+### wide enough to hold the intermediate values and the maximum
+### value of the original type, and returns the result, which
+### is within the range of the original type;
+###
+### the formulas are the ones from Pillow's Chops.c, with 255
+### replaced by the maximum value (and 128, 127 and 65536 by the
+### corresponding values), using integer division, which rounds
+### like C does since all operands are non-negative
+
+def add(a, b, maximum, numpy):
+    return numpy.minimum(a + b, maximum)
+
+
+def subtract(a, b, maximum, numpy):
+    return numpy.maximum(a - b, 0)
+
+
+def multiply(a, b, maximum, numpy):
+    return a * b // maximum
+
+
+def screen(a, b, maximum, numpy):
+    return maximum - (maximum - a) * (maximum - b) // maximum
+
+
+def difference(a, b, maximum, numpy):
+    return numpy.abs(a - b)
+
+
+def darker(a, b, maximum, numpy):
+    return numpy.minimum(a, b)
+
+
+def lighter(a, b, maximum, numpy):
+    return numpy.maximum(a, b)
+
+
+def soft_light(a, b, maximum, numpy):
+
+    return (
+      (maximum - a) * (a * b) // (maximum + 1) ** 2
+      + a * (maximum - (maximum - a) * (maximum - b) // maximum) // maximum
+    )
+
+
+def hard_light(a, b, maximum, numpy):
+
+    half = maximum // 2
+
+    return numpy.where(
+             b <= half,
+             a * b // half,
+             maximum - (maximum - b) * (maximum - a) // half,
+           )
+
+
+def overlay(a, b, maximum, numpy):
+    return hard_light(b, a, maximum, numpy)
+
+
+NUMPY_OPERATION_MAP = {
+  'add'             : add,
+  'darker'          : darker,
+  'difference'      : difference,
+  'lighter'         : lighter,
+  'multiply'        : multiply,
+  'soft_light'      : soft_light,
+  'hard_light'      : hard_light,
+  'overlay'         : overlay,
+  'screen'          : screen,
+  'subtract'        : subtract,
+}
+
+### number of values multiplied together by each operation,
+### used to pick integers wide enough for the intermediate
+### values (the narrower, the faster)
+
+MULTIPLIED_VALUES = {
+  'add'             : 1,
+  'darker'          : 1,
+  'difference'      : 1,
+  'lighter'         : 1,
+  'multiply'        : 2,
+  'soft_light'      : 3,
+  'hard_light'      : 2,
+  'overlay'         : 2,
+  'screen'          : 2,
+  'subtract'        : 1,
+}
+
+
+def get_wide_dtype(maximum, operation_name, numpy):
+    """Return signed integer type for intermediate values."""
+    ### operations multiplying a single value (that is, none)
+    ### add two values at most
+
+    largest_value = max(
+                      (maximum + 1) ** MULTIPLIED_VALUES[operation_name],
+                      maximum * 2,
+                    )
+
+    for dtype in (numpy.int16, numpy.int32, numpy.int64):
+
+        if largest_value <= numpy.iinfo(dtype).max:
+            return dtype
+
+
+def blend_arrays(array1, array2, operation_name, opacity=1.0, out=None):
+    """Return result of mixing arrays with operation.
+
+    Parameters
+    ==========
+
+    array1, array2 (numpy.ndarray)
+        arrays of the same unsigned integer type (uint8 or
+        uint16) whose shapes can be broadcast together, like
+        (height, width, bands) and (bands,) for a solid color.
+    operation_name (string)
+        name of the operation, one of the keys of
+        NUMPY_OPERATION_MAP.
+    opacity (float)
+        from 0.0 to 1.0; the result is mixed with array1 like
+        Image.blend(array1, result, opacity) would. At 1.0, it
+        is the result of the operation itself.
+    out (None or numpy.ndarray)
+        array to store the result in, which must have the
+        broadcast shape and the type of the arrays; it may be
+        one of them, to mix in place. If None, a new array is
+        allocated.
+
+    Returns
+    =======
+    The out array.
+    """
+    numpy = import_numpy()
+
+    operation = NUMPY_OPERATION_MAP[operation_name]
+    opacity = min(max(float(opacity), 0.0), 1.0)
+
+    array1 = numpy.asarray(array1)
+    array2 = numpy.asarray(array2)
+
+    dtype = array1.dtype
+
+    if dtype != array2.dtype or dtype not in (numpy.uint8, numpy.uint16):
+        raise ValueError("arrays must be both uint8 or both uint16")
+
+    maximum = numpy.iinfo(dtype).max
+    wide_dtype = get_wide_dtype(maximum, operation_name, numpy)
+
+    shape = numpy.broadcast_shapes(array1.shape, array2.shape)
+
+    if out is None:
+        out = numpy.empty(shape, dtype)
+
+    elif out.shape != shape or out.dtype != dtype:
+        raise ValueError("out must have the shape and type of the result")
+
+    ### process blocks of rows (along the first axis), so the
+    ### temporary arrays stay small; arrays which are broadcast
+    ### along that axis are used whole by each block
+
+    if not shape:
+        block_rows = height = 1
+
+    else:
+
+        height = shape[0]
+
+        row_bytes = out[:1].nbytes or 1
+        block_rows = max(BLOCK_BYTES // row_bytes, 1)
+
+    def get_block(array, start, stop):
+
+        if shape and array.ndim == len(shape) and array.shape[0] == height:
+            return array[start:stop]
+
+        return array
+
+    for start in range(0, height, block_rows):
+
+        stop = start + block_rows
+
+        a = get_block(array1, start, stop).astype(wide_dtype)
+        b = get_block(array2, start, stop).astype(wide_dtype)
+
+        result = operation(a, b, maximum, numpy)
+
+        ## apply the opacity like Image.blend() does, that is,
+        ## with single precision floats, truncating the result
+
+        if opacity != 1.0:
+
+            a = a.astype(numpy.float32)
+
+            result = (
+              a
+              + numpy.float32(opacity) * (result.astype(numpy.float32) - a)
+            )
+
+        if shape:
+            out[start:stop] = result
+
+        else:
+            out[...] = result
+
+    return out
+
+
+def get_array(image, box, numpy):
+    """Return array with pixels of image within box.
+
+    For symbolic solid color images, the array only holds the
+    color, broadcast to the size of the box, so no memory is
+    allocated for the pixels.
+    """
+    left, upper, right, lower = box
+
+    if isinstance(image, ConstantImage):
+
+        color = numpy.array(
+                  image.color if len(image.color) > 1 else image.color[0],
+                  numpy.uint16 if image.mode == 'I;16' else numpy.uint8,
+                )
+
+        return numpy.broadcast_to(
+                 color,
+                 (lower - upper, right - left, *color.shape),
+               )
+
+    if box != (0, 0, *image.size):
+        image = image.crop(box)
+
+    return numpy.asarray(image)
+
+
+def can_mix_with_numpy(image1, image2):
+    """Return True if NumPy is installed and supports images."""
+    if image1.mode != image2.mode or image1.mode not in NUMPY_MODES:
+        return False
+
+    try:
+        import_numpy()
+
+    except ImportError:
+        return False
+
+    return True
+
+
+def mix_with_numpy(image1, image2, operation_name, opacity=1.0, threads=0):
+    """Return result of mixing images using NumPy.
+
+    Works like ImageChops operations, including the size of the
+    result, which is the region the images have in common, but
+    also supports I;16 images and applies the opacity (see
+    blend_arrays()).
+
+    If threads is higher than 0, the images are mixed strip by
+    strip by that many threads, each strip being written to
+    the output array allocated beforehand. NumPy releases the
+    GIL while computing, so strips are mixed in parallel.
+    """
+    numpy = import_numpy()
+
+    if image1.mode != image2.mode:
+        raise ValueError("images do not match")
+
+    if image1.mode not in NUMPY_MODES:
+        raise ValueError(f"the 'numpy' engine doesn't support {image1.mode}")
+
+    size = width, height = (
+      min(image1.width, image2.width),
+      min(image1.height, image2.height),
+    )
+
+    if not threads:
+
+        box = (0, 0, *size)
+
+        ## the mode of the result is inferred from the shape and
+        ## type of the array, which match the ones of the images
+
+        return fromarray(
+                 blend_arrays(
+                   get_array(image1, box, numpy),
+                   get_array(image2, box, numpy),
+                   operation_name,
+                   opacity,
+                 )
+               )
+
+    ### decode lazily loaded images in this thread (see
+    ### tiling.map_in_strips())
+
+    for image in (image1, image2):
+
+        if not isinstance(image, ConstantImage):
+            image.load()
+
+    ### allocate the output upfront, so each thread writes its
+    ### strips directly into it
+
+    band_count = len(getmode(image1.mode).bands)
+
+    out = numpy.empty(
+            (height, width) + ((band_count,) if band_count > 1 else ()),
+            numpy.uint16 if image1.mode == 'I;16' else numpy.uint8,
+          )
+
+    def mix_strip(box):
+
+        _, upper, _, lower = box
+
+        blend_arrays(
+          get_array(image1, box, numpy),
+          get_array(image2, box, numpy),
+          operation_name,
+          opacity,
+          out[upper:lower],
+        )
+
+    run_in_strips(mix_strip, size, threads)
+
+    return fromarray(out)
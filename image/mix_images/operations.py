@@ -0,0 +1,30 @@
+"""Operations available for mixing images."""
+
+### third-party imports
+
+from PIL.ImageChops import (
+                      add,
+                      darker,
+                      difference,
+                      lighter,
+                      multiply,
+                      soft_light,
+                      hard_light,
+                      overlay,
+                      screen,
+                      subtract,
+                    )
+
+
+BLEND_OPERATION_MAP = {
+  'add'             : add,
+  'darker'          : darker,
+  'difference'      : difference,
+  'lighter'         : lighter,
+  'multiply'        : multiply,
+  'soft_light'      : soft_light,
+  'hard_light'      : hard_light,
+  'overlay'         : overlay,
+  'screen'          : screen,
+  'subtract'        : subtract,
+}
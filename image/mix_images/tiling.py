@@ -0,0 +1,105 @@
+"""Facility for mixing images strip by strip using threads.
+
+The images are split in horizontal strips which are mixed by a
+pool of threads and pasted into an output image allocated
+beforehand. Pillow releases the GIL while cropping, pasting and
+applying lookup tables, and NumPy while running ufuncs, so such
+work is done in parallel. ImageChops operations, however, hold
+the GIL, except on free-threaded Python builds.
+"""
+
+### standard library import
+from concurrent.futures import ThreadPoolExecutor
+
+
+### third-party import
+from PIL.Image import new as new_image
+
+
+### number of bytes of output per strip; strips are kept small
+### so that the strips cropped from the inputs, the result and
+### the pasted output stay in the CPU caches, otherwise the
+### cropping and pasting would cost more than the threads save
+STRIP_BYTES = 1 << 19
+
+
+def get_strip_boxes(size, threads):
+    """Return boxes of horizontal strips covering size.
+
+    There are at least a few strips per thread, so threads
+    finishing early can take more strips.
+    """
+    width, height = size
+
+    rows_per_strip = max(
+      min(
+        -(-STRIP_BYTES // (width * 4 or 1)),
+        -(-height // (threads * 4)),
+      ),
+      1,
+    )
+
+    return [
+      (0, upper, width, min(upper + rows_per_strip, height))
+      for upper in range(0, height, rows_per_strip)
+    ]
+
+
+def run_in_strips(function, size, threads):
+    """Call function with the box of each strip, using threads.
+
+    Errors raised by function are raised here.
+    """
+    with ThreadPoolExecutor(threads) as executor:
+
+        ## consume the results so errors are raised
+        for _ in executor.map(function, get_strip_boxes(size, threads)):
+            pass
+
+
+def map_in_strips(function, images, size, threads):
+    """Return result of function applied strip by strip.
+
+    Parameters
+    ==========
+
+    function (callable)
+        receives a strip of each image (in the same order) and
+        returns the resulting strip, which must have the same
+        mode as the first image.
+    images (list of PIL.Image.Image)
+        images to be split in strips.
+    size (2-tuple of integers)
+        size of the result; each image must be at least as
+        large.
+    threads (positive integer)
+        number of threads used.
+
+    The result also gets the palette and info of the first
+    image, like the results of ImageChops operations.
+    """
+    first_image = images[0]
+
+    ### decode lazily loaded images (like the ones from the
+    ### open_image node) in this thread, before the threads start
+    ### cropping them, otherwise several threads would decode
+    ### from the same file at once
+
+    for image in images:
+        image.load()
+
+    ### allocate the output upfront, so each thread pastes its
+    ### strips directly into it
+
+    output = first_image._new(new_image(first_image.mode, size).im)
+
+    def mix_strip(box):
+
+        output.paste(
+          function(*(image.crop(box) for image in images)),
+          box[:2],
+        )
+
+    run_in_strips(mix_strip, size, threads)
+
+    return output
@@ -0,0 +1,56 @@
+
+### third-party import
+from PIL.Image import Image
+
+
+### local import
+from ..new_color_image.fills import make_checkerboard
+
+
+def new_checkerboard(
+
+      size: tuple,
+
+      color1 : {
+        'widget_name': 'color_button',
+        'type': tuple,
+      } = (255, 255, 255),
+
+      color2 : {
+        'widget_name': 'color_button',
+        'type': tuple,
+      } = (204, 204, 204),
+
+      square_size: 'natural_number' = 16,
+
+    ) -> [
+
+      {'name': 'image', 'type': Image},
+      {'name': 'mode', 'type': str},
+
+    ]:
+    """Creates a new image with a checkerboard pattern.
+
+    The mode will be either RGB or RGBA, depending on
+    whether any of the colors has alpha or not.
+
+    Parameters
+    ==========
+
+    size (2-tuple of integers)
+        integers represent size (width and height) in pixels
+    color1, color2 (tuples)
+        colors of the squares (each an RGB or RGBA tuple of
+        integers); the top left square has color1.
+    square_size (natural number)
+        width and height of each square in pixels (at least
+        1).
+    """
+    image = make_checkerboard(size, max(square_size, 1), color1, color2)
+
+    return {
+      'image' : image,
+      'mode'  : image.mode,
+    }
+
+main_callable = new_checkerboard
@@ -1,9 +1,24 @@
 
+### third-party imports
+
 from PIL.Image import (
                  Image,
                  new as new_image,
                )
 
+
+### local imports
+
+from ..open_image.cache import ImageCache
+
+from .constant import ConstantImage
+
+
+### process-wide cache of solid color images, holding up to
+### 512 MiB of pixels
+COLOR_IMAGES = ImageCache(1 << 29)
+
+
 def new_color_image(
 
       size: tuple,
@@ -13,10 +28,15 @@ def new_color_image(
         'type': tuple,
       } = (255, 0, 0),
 
+      use_cache: bool = False,
+
+      symbolic: bool = False,
+
     ) -> [
 
       {'name': 'image', 'type': Image},
       {'name': 'mode', 'type': str},
+      {'name': 'reuse_count', 'type': int},
 
     ]:
     """Creates a new image with the given size and color.
@@ -37,20 +57,76 @@ def new_color_image(
         RGB images, you can also use color strings as
         supported by the ImageColor module. If the color
         is None, the image is not initialised.
+    use_cache (bool)
+        if True, created images are kept in a process-wide
+        cache holding up to 512 MiB of pixels, so requesting
+        the same size and color again returns right away,
+        without allocating and filling another image. The
+        returned images are read-only handles sharing the
+        cached pixels: changing one of them with paste(),
+        putpixel() or ImageDraw copies its pixels first,
+        leaving the cached image and other handles untouched,
+        but writing through the object returned by its load()
+        method raises ValueError, so nodes doing that must
+        call copy() first. False by default.
+    symbolic (bool)
+        if True, a ConstantImage is returned instead, which only
+        stores the mode, size and color. The mix_images node
+        uses the color directly, mixing the other image through
+        a lookup table, which reads half as many pixels and
+        doesn't allocate the solid color image at all. It is
+        not a regular image: calling its methods works (the
+        image is created when first needed), but nodes passing
+        it to Pillow functions, like Image.paste(), must call
+        its to_image() method first. use_cache is ignored.
+
+    Returns
+    =======
+    A dict with the image, its mode and the number of times
+    the cached image was reused so far (0 when the image was
+    just created, use_cache is False or symbolic is True).
     """
     mode = 'RGBA' if len(color) == 4 else 'RGB'
 
-    # new_image = PIL.Image.new
+    ### if requested, just describe the image
+
+    if symbolic:
+
+        image = ConstantImage(mode, size, color)
+        reuse_count = 0
+
+    ### if requested, try retrieving the image from the cache,
+    ### creating and caching it if it isn't there yet
+
+    elif use_cache:
+
+        key = (mode, tuple(size), tuple(color))
+
+        image = COLOR_IMAGES.get(key)
+
+        if image is None:
+            image = COLOR_IMAGES.put(key, new_image(mode, size, color))
+
+        reuse_count = COLOR_IMAGES.get_hits(key)
+
+    ### otherwise just create it
+
+    else:
+
+        # new_image = PIL.Image.new
+
+        image = new_image(
+                  mode,
+                  size,
+                  color
+                )
 
-    image = new_image(
-              mode,
-              size,
-              color
-            )
+        reuse_count = 0
 
     return {
-      'image' : image,
-      'mode'  : mode,
+      'image'       : image,
+      'mode'        : mode,
+      'reuse_count' : reuse_count,
     }
 
 main_callable = new_color_image
@@ -0,0 +1,83 @@
+"""Facility for representing solid color images symbolically."""
+
+### third-party import
+from PIL.Image import new as new_image
+
+
+class ConstantImage:
+    """Image whose pixels all have the same color.
+
+    Only the mode, size and color are stored. Nodes aware of
+    it (like mix_images) can use the color directly instead of
+    reading pixels.
+
+    It is not a PIL.Image.Image, though. Accessing any other
+    attribute creates the equivalent image (once) and returns
+    the attribute from it, so methods called on it work, like
+    crop() or save(). Functions receiving it as an argument,
+    however, like Image.paste(), ImageChops functions or
+    isinstance() checks, don't accept it; code giving it to
+    them must call to_image() to get a regular image first.
+    """
+
+    def __init__(self, mode, size, color):
+
+        self.mode = mode
+        self.size = tuple(size)
+
+        ### store one value per band
+
+        self.color = (
+          tuple(color)
+          if isinstance(color, (tuple, list))
+          else (color,)
+        )
+
+        self._image = None
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    def to_image(self):
+        """Return equivalent PIL.Image.Image.
+
+        The same image is returned every time.
+        """
+        if self._image is None:
+
+            # new_image = PIL.Image.new
+
+            self._image = new_image(
+                            self.mode,
+                            self.size,
+                            (
+                              self.color
+                              if len(self.color) > 1
+                              else self.color[0]
+                            ),
+                          )
+
+        return self._image
+
+    def __getattr__(self, name):
+        """Return attribute from equivalent PIL.Image.Image."""
+        ### avoid recursion when _image isn't set yet (while
+        ### unpickling, for instance)
+
+        if name == '_image':
+            raise AttributeError(name)
+
+        return getattr(self.to_image(), name)
+
+    def __repr__(self):
+
+        return (
+          f'<{self.__class__.__name__}'
+          f' mode={self.mode} size={self.width}x{self.height}'
+          f' color={self.color}>'
+        )
@@ -0,0 +1,284 @@
+"""Facility for generating procedural fills.
+
+Fills are built from small images (256x256 gradients or a
+single period of a pattern) which are colorized with lookup
+tables and then transformed or tiled to the requested size,
+so the work per pixel is done in C.
+"""
+
+### standard library imports
+
+from functools import lru_cache
+
+from math import cos, hypot, radians, sin
+
+from random import Random
+
+
+### third-party imports
+
+from PIL.Image import (
+                 Resampling,
+                 Transform,
+                 frombytes,
+                 linear_gradient,
+                 merge,
+                 new as new_image,
+               )
+
+
+### radius, in pixels, of the image with distances used to
+### make radial gradients
+DISTANCE_TABLE_RADIUS = 128
+
+### number of pixels above which radial gradients are sampled
+### at a reduced size
+REDUCED_SAMPLING_PIXELS = 1 << 22
+
+
+def get_mode_and_colors(color1, color2):
+    """Return mode for colors and colors with one value per band.
+
+    The mode is RGBA if any color has alpha, and RGB otherwise;
+    colors without alpha are made opaque.
+    """
+    mode = 'RGBA' if 4 in (len(color1), len(color2)) else 'RGB'
+
+    return (
+      mode,
+      (tuple(color1) + (255,))[:len(mode)],
+      (tuple(color2) + (255,))[:len(mode)],
+    )
+
+
+def colorize(mask, color1, color2):
+    """Return image with mask values mapped to colors.
+
+    Values of the L mode mask are mapped linearly from color1
+    (at 0) to color2 (at 255), each band using its own lookup
+    table.
+    """
+    mode, color1, color2 = get_mode_and_colors(color1, color2)
+
+    return merge(
+             mode,
+             [
+               mask.point(
+                 [
+                   round(value1 + (value2 - value1) * value / 255)
+                   for value in range(256)
+                 ]
+               )
+               for value1, value2 in zip(color1, color2)
+             ],
+           )
+
+
+def tile_image(tile, size):
+    """Return image of given size filled by repeating tile.
+
+    The filled area is doubled with each paste, so only a few
+    pastes are needed regardless of the size.
+    """
+    width, height = size
+    tile_width, tile_height = tile.size
+
+    image = new_image(tile.mode, size)
+    image.paste(tile, (0, 0))
+
+    filled_width = tile_width
+
+    while filled_width < width:
+
+        image.paste(
+          image.crop((0, 0, filled_width, tile_height)),
+          (filled_width, 0),
+        )
+
+        filled_width *= 2
+
+    filled_height = tile_height
+
+    while filled_height < height:
+
+        image.paste(
+          image.crop((0, 0, width, filled_height)),
+          (0, filled_height),
+        )
+
+        filled_height *= 2
+
+    return image
+
+
+def make_linear_gradient(size, angle, color1, color2):
+    """Return linear gradient from color1 to color2.
+
+    The angle is measured in degrees, clockwise from the
+    direction going from left to right.
+    """
+    width, height = size
+
+    ### colorize Pillow's vertical gradient, whose rows go from
+    ### 0 to 255, and map each pixel to the row corresponding
+    ### to its position along the direction of the gradient;
+    ###
+    ### each row holds a single value, so nearest neighbour
+    ### sampling gives the same result as interpolating, only
+    ### much faster
+
+    gradient = colorize(linear_gradient('L'), color1, color2)
+
+    direction_x = cos(radians(angle))
+    direction_y = sin(radians(angle))
+
+    ## length of the image along the direction and position
+    ## along it where the gradient starts (the corner reached
+    ## first)
+
+    length = abs(direction_x) * width + abs(direction_y) * height or 1
+
+    start = min(direction_x * width, 0) + min(direction_y * height, 0)
+
+    ## Pillow samples pixels at their centres, which map to
+    ## positions between 0.5 and 255.5, so the rows picked are
+    ## the rounded positions
+
+    return gradient.transform(
+             size,
+             Transform.AFFINE,
+             (
+               0,
+               0,
+               128,
+               255 * direction_x / length,
+               255 * direction_y / length,
+               0.5 - 255 * start / length,
+             ),
+             Resampling.NEAREST,
+           )
+
+
+@lru_cache(maxsize=1)
+def get_distance_table():
+    """Return image holding distances from its center.
+
+    Values go from 0 at the center to 255 at a distance of
+    DISTANCE_TABLE_RADIUS pixels, staying 255 beyond it. Unlike
+    Pillow's radial_gradient(), whose values are truncated and
+    only reach 255 at the corners, values are rounded and the
+    whole circle fits in the image.
+    """
+    radius = DISTANCE_TABLE_RADIUS
+    diameter = radius * 2
+
+    ### distances are measured from pixel centres
+
+    return frombytes(
+             'L',
+             (diameter, diameter),
+             bytes(
+               min(
+                 round(
+                   255 * hypot(x + 0.5 - radius, y + 0.5 - radius) / radius
+                 ),
+                 255,
+               )
+               for y in range(diameter)
+               for x in range(diameter)
+             ),
+           )
+
+
+def make_radial_gradient(size, center, radius, color1, color2):
+    """Return radial gradient from color1 to color2.
+
+    color1 is at the center and color2 is at the radius and
+    beyond. If radius is 0, the distance from the center to
+    the farthest corner is used.
+    """
+    width, height = size
+    center_x, center_y = center
+
+    if not radius:
+
+        radius = max(
+                   hypot(corner_x - center_x, corner_y - center_y)
+                   for corner_x in (0, width)
+                   for corner_y in (0, height)
+                 ) or 1
+
+    ### large gradients are sampled at a reduced size and then
+    ### enlarged, which is much faster and, since the distances
+    ### change smoothly, differs by at most a couple of levels
+
+    factor = 2 if width * height > REDUCED_SAMPLING_PIXELS else 1
+
+    sample_width = -(-width // factor)
+    sample_height = -(-height // factor)
+
+    ### map each pixel to its position in the distance table;
+    ### Pillow samples pixels at their centres, so the ones
+    ### of the sample are mapped to the corresponding points
+    ### of the image first; pixels mapped beyond the table are
+    ### beyond the radius, so they're filled with 255
+
+    scale = DISTANCE_TABLE_RADIUS / radius
+
+    scale_x = scale * width / sample_width
+    scale_y = scale * height / sample_height
+
+    mask = get_distance_table().transform(
+             (sample_width, sample_height),
+             Transform.AFFINE,
+             (
+               scale_x,
+               0,
+               DISTANCE_TABLE_RADIUS - center_x * scale,
+               0,
+               scale_y,
+               DISTANCE_TABLE_RADIUS - center_y * scale,
+             ),
+             Resampling.BILINEAR,
+             fillcolor=255,
+           )
+
+    if factor > 1:
+        mask = mask.resize(size, Resampling.BILINEAR)
+
+    return colorize(mask, color1, color2)
+
+
+def make_checkerboard(size, square_size, color1, color2):
+    """Return checkerboard with squares of alternating colors.
+
+    The top left square has color1.
+    """
+    mode, color1, color2 = get_mode_and_colors(color1, color2)
+
+    tile = new_image(mode, (square_size * 2,) * 2, color1)
+
+    for box in (
+      (square_size, 0, square_size * 2, square_size),
+      (0, square_size, square_size, square_size * 2),
+    ):
+        tile.paste(color2, box)
+
+    return tile_image(tile, size)
+
+
+def make_noise(size, seed, monochrome):
+    """Return image with uniformly distributed random values.
+
+    The same seed always gives the same image. If monochrome is
+    True, all bands have the same values.
+    """
+    width, height = size
+
+    data = Random(seed).randbytes(
+             width * height * (1 if monochrome else 3)
+           )
+
+    image = frombytes('L' if monochrome else 'RGB', size, data)
+
+    return image.convert('RGB') if monochrome else image
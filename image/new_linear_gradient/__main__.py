@@ -0,0 +1,58 @@
+
+### third-party import
+from PIL.Image import Image
+
+
+### local import
+from ..new_color_image.fills import make_linear_gradient
+
+
+def new_linear_gradient(
+
+      size: tuple,
+
+      color1 : {
+        'widget_name': 'color_button',
+        'type': tuple,
+      } = (0, 0, 0),
+
+      color2 : {
+        'widget_name': 'color_button',
+        'type': tuple,
+      } = (255, 255, 255),
+
+      angle: float = 0.0,
+
+    ) -> [
+
+      {'name': 'image', 'type': Image},
+      {'name': 'mode', 'type': str},
+
+    ]:
+    """Creates a new image with a linear gradient.
+
+    The mode will be either RGB or RGBA, depending on
+    whether any of the colors has alpha or not.
+
+    Parameters
+    ==========
+
+    size (2-tuple of integers)
+        integers represent size (width and height) in pixels
+    color1, color2 (tuples)
+        colors at the start and at the end of the gradient
+        (each an RGB or RGBA tuple of integers).
+    angle (float)
+        direction of the gradient in degrees, clockwise from
+        left to right; 90 goes from top to bottom. The
+        gradient spans the whole image along that direction,
+        from the first corner it reaches to the last one.
+    """
+    image = make_linear_gradient(size, angle, color1, color2)
+
+    return {
+      'image' : image,
+      'mode'  : image.mode,
+    }
+
+main_callable = new_linear_gradient
@@ -0,0 +1,45 @@
+
+### third-party import
+from PIL.Image import Image
+
+
+### local import
+from ..new_color_image.fills import make_noise
+
+
+def new_noise_image(
+
+      size: tuple,
+
+      seed: int = 0,
+
+      monochrome: bool = False,
+
+    ) -> [
+
+      {'name': 'image', 'type': Image},
+      {'name': 'mode', 'type': str},
+
+    ]:
+    """Creates a new RGB image with uniform random noise.
+
+    Parameters
+    ==========
+
+    size (2-tuple of integers)
+        integers represent size (width and height) in pixels
+    seed (integer)
+        seed of the random number generator; the same seed
+        always gives the same image.
+    monochrome (bool)
+        if True, all bands have the same values, so the noise
+        is gray.
+    """
+    image = make_noise(size, seed, monochrome)
+
+    return {
+      'image' : image,
+      'mode'  : image.mode,
+    }
+
+main_callable = new_noise_image
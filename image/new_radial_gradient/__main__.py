@@ -0,0 +1,68 @@
+
+### third-party import
+from PIL.Image import Image
+
+
+### local import
+from ..new_color_image.fills import make_radial_gradient
+
+
+def new_radial_gradient(
+
+      size: tuple,
+
+      color1 : {
+        'widget_name': 'color_button',
+        'type': tuple,
+      } = (255, 255, 255),
+
+      color2 : {
+        'widget_name': 'color_button',
+        'type': tuple,
+      } = (0, 0, 0),
+
+      center: 'python_literal' = None,
+
+      radius: float = 0.0,
+
+    ) -> [
+
+      {'name': 'image', 'type': Image},
+      {'name': 'mode', 'type': str},
+
+    ]:
+    """Creates a new image with a radial gradient.
+
+    The mode will be either RGB or RGBA, depending on
+    whether any of the colors has alpha or not.
+
+    Parameters
+    ==========
+
+    size (2-tuple of integers)
+        integers represent size (width and height) in pixels
+    color1, color2 (tuples)
+        colors at the center and at the radius of the
+        gradient (each an RGB or RGBA tuple of integers);
+        pixels beyond the radius have color2.
+    center (None or 2-tuple of numbers)
+        position of the center in pixels; if None, the center
+        of the image is used.
+    radius (float)
+        radius in pixels; if 0, the distance from the center
+        to the farthest corner is used, so the gradient
+        covers the whole image.
+    """
+    width, height = size
+
+    if center is None:
+        center = (width / 2, height / 2)
+
+    image = make_radial_gradient(size, center, radius, color1, color2)
+
+    return {
+      'image' : image,
+      'mode'  : image.mode,
+    }
+
+main_callable = new_radial_gradient
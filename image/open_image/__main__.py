@@ -21,6 +21,21 @@ dummy_image_path = \
 image_str_path = str(dummy_image_path)
 
 
+### local imports
+
+from .reduction import reduce_on_load
+
+from .loading import decode_image, read_size
+
+from .budget import get_reduce_factor, reduce_image
+
+from .cache import DECODED_IMAGES, get_file_key
+
+from .mapping import map_image
+
+from .frames import FrameSequence
+
+
 ### function definition
 
 def open_image(
@@ -30,6 +45,20 @@ def open_image(
         'type' : str
       } = image_str_path,
 
+      lazy: bool = False,
+
+      target_size: 'python_literal' = None,
+
+      crop_box: 'python_literal' = None,
+
+      max_pixels: 'natural_number' = 0,
+
+      use_cache: bool = False,
+
+      memory_map: bool = False,
+
+      frame_cache_size: 'natural_number' = 0,
+
     ) -> [
 
       {'name' : 'image',  'type': Image},
@@ -37,9 +66,11 @@ def open_image(
       {'name' : 'height', 'type': int},
       {'name' : 'size',   'type': tuple},
       {'name' : 'mode',   'type': str},
+      {'name' : 'frames', 'type': FrameSequence},
+      {'name' : 'scale',  'type': float},
 
     ]:
-    """Return PIL.Image.Image obj copy from filepath.
+    """Return PIL.Image.Image obj from filepath.
 
     Parameters
     ==========
@@ -48,10 +79,93 @@ def open_image(
         path to image file. If a file object is given
         it must implement read(), seek(), and tell()
         methods, and be opened in binary mode.
+    lazy (bool)
+        if True, only the header of the file is read; the
+        width, height, size and mode are available right
+        away, but the pixels are only decoded when a
+        downstream node first accesses them (Pillow calls
+        Image.load() for us then). The file stays open until
+        that happens, and a lazy image can't be decoded by
+        several threads at once, so nodes using threads
+        must call its load() method first. If False (the
+        default), the pixels are decoded right away and the
+        file is closed.
+    target_size (None or 2-tuple of integers)
+        if given, JPEG and JPEG 2000 files are decoded
+        directly at a reduced resolution which is as close
+        as possible to this size without being smaller than
+        it, which is much faster and uses much less memory
+        when the image is only needed for previews. Other
+        formats are always decoded at full size.
+    crop_box (None or 4-tuple of integers)
+        if given, only this region (left, upper, right and
+        lower coordinates, relative to the full size image)
+        is returned. For files whose pixels are split in
+        tiles or strips (tiled or striped uncompressed TIFF
+        files, for instance), only the tiles overlapping the
+        region are decoded, so regions of huge images can be
+        used without allocating the whole image. Other files
+        are decoded entirely and then cropped. The region is
+        decoded right away, regardless of the value of lazy.
+        When used with target_size, the region is scaled along
+        with the image.
+    max_pixels (natural number)
+        if higher than 0, the maximum number of pixels of the
+        returned image (or region). Larger images are reduced
+        by the smallest integer factor which makes them fit,
+        using the reduced decoding of JPEG and JPEG 2000 files
+        and decoding tiled or striped files band by band, so
+        that the full size image is never allocated. Other
+        files are decoded at full size before being reduced.
+        Images exceeding the budget are decoded right away,
+        regardless of the value of lazy. Note that Pillow still
+        refuses to open images over twice its own limit (see
+        the warning further below).
+    use_cache (bool)
+        if True, decoded images are kept in a process-wide
+        cache, so opening the same file again (with the same
+        options) while it is unchanged on disk (same
+        modification time and size) doesn't decode it again.
+        The cache holds up to 1 GiB of pixels, evicting the
+        least recently used images. The returned images are
+        read-only handles sharing the cached pixels: changing
+        one of them with paste(), putpixel() or ImageDraw
+        copies its pixels first, so the cache and other nodes
+        aren't affected, but writing through the object
+        returned by its load() method raises ValueError, so
+        nodes doing that must call copy() first (or leave this
+        option off, the default). Since the pixels must
+        be decoded to be cached, lazy is ignored when this is
+        True, except for file objects, which aren't cached.
+    memory_map (bool)
+        if True and the file stores its pixels uncompressed in
+        the layout Pillow uses in memory (8-bit binary PGM,
+        8-bit grayscale or palette BMP and uncompressed
+        grayscale or RGBA TIFF files, for instance), the image
+        is built over a memory map of the file instead, so it
+        opens instantly, its pixels are paged in by the system
+        on demand and the pages are shared among processes.
+        The file must not be changed while the image is in
+        use. For other files, or when a target_size is given,
+        the image is loaded as usual. If a crop_box is given,
+        only the pixels in the region are copied from the map.
+    frame_cache_size (natural number)
+        number of decoded frames kept by the frames output (see
+        below), so accessing them again is faster.
 
     Returns
     =======
-    An Image object.
+    A dict with the image (the first frame, for multi-frame
+    files), its width, height, size and mode, as well as a
+    sequence with all the frames of the file (a FrameSequence
+    instance). The frames are only decoded when accessed by
+    index or iterated over, which is done seeking in the file,
+    so frame stacks much larger than the available memory can
+    be processed one frame at a time. The frames are always
+    decoded at full size. The scale is the width of the image
+    divided by the width it (or the region) has in the file,
+    which is lower than 1 when the image was reduced due to
+    target_size or max_pixels.
 
     Raises
     ======
@@ -78,15 +192,124 @@ def open_image(
     See also the logging documentation to have warnings
     output to the logging facility instead of stderr.
     """
-    ### retrieve a copy of the image, so the file can
-    ### be closed
+    ### python_literal widgets may give lists instead of tuples,
+    ### which couldn't be part of the cache key (and are used as
+    ### boxes and sizes below), so they're converted
+
+    if target_size is not None:
+        target_size = tuple(target_size)
+
+    if crop_box is not None:
+        crop_box = tuple(crop_box)
+
+    ### if requested, try mapping the image over the file
+
+    image = (
+      map_image(filepath)
+      if memory_map and target_size is None
+      else None
+    )
+
+    ### if requested (and the image wasn't mapped), try
+    ### retrieving the decoded image from the cache, decoding
+    ### and caching it if it isn't there yet
+
+    cache_key = (
+      get_file_key(filepath, target_size, crop_box, max_pixels)
+      if use_cache and image is None
+      else None
+    )
+
+    ### if the image was mapped, crop and reduce it as needed;
+    ###
+    ### since mapped pixels don't take memory until accessed,
+    ### we can reduce them to fit the budget, if needed, without
+    ### allocating the full size image
+
+    if image is not None:
+
+        if crop_box is not None:
+            image = image.crop(crop_box)
+
+        if max_pixels:
+
+            factor = get_reduce_factor(image.size, max_pixels)
+
+            if factor > 1:
+                image = reduce_image(image, factor)
+
+    elif cache_key is not None:
+
+        image = DECODED_IMAGES.get(cache_key)
+
+        if image is None:
+
+            image = DECODED_IMAGES.put(
+                      cache_key,
+                      decode_image(
+                        filepath,
+                        target_size,
+                        crop_box,
+                        max_pixels,
+                      ),
+                    )
+
+    ### if loading lazily, just keep the image object returned
+    ### by Pillow; it only parsed the header so far, and will
+    ### decode the pixels (and close the file, when it opened
+    ### it itself) once they are needed
+
+    elif lazy and crop_box is None:
+
+        # pil_open_image = PIL.Image.open
+        image = pil_open_image(filepath, 'r')
+
+        if target_size is not None:
+            image = reduce_on_load(image, target_size)
+
+        ## if the image exceeds the pixel budget, though, it
+        ## must be decoded right away, so it can be reduced
+
+        if max_pixels and image.width * image.height > max_pixels:
+
+            image.close()
+
+            image = decode_image(
+                      filepath,
+                      target_size,
+                      crop_box,
+                      max_pixels,
+                    )
+
+    ### otherwise decode the image right away
+
+    else:
+
+        image = decode_image(
+                  filepath,
+                  target_size,
+                  crop_box,
+                  max_pixels,
+                )
+
+    ### calculate the scale of the image in relation to the
+    ### file; it can only be lower than 1 if the image was
+    ### reduced
+
+    if target_size is None and not max_pixels:
+        scale = 1.0
+
+    else:
 
-    # pil_open_image = PIL.Image.open
+        original_width = (
+          read_size(filepath)[0]
+          if crop_box is None
+          else crop_box[2] - crop_box[0]
+        )
 
-    with pil_open_image(filepath, 'r') as temp_image:
-        image = temp_image.copy()
+        scale = image.width / original_width
 
-    ### return the copy along with its data
+    ### return the image along with its data
 
     return {
       'image'  : image,
@@ -94,6 +317,8 @@ def open_image(
       'height' : image.height,
       'size'   : image.size,
       'mode'   : image.mode,
+      'frames' : FrameSequence(filepath, frame_cache_size),
+      'scale'  : scale,
     }
 
 ### function aliasing
@@ -0,0 +1,164 @@
+"""Facility for keeping decoded images within a pixel budget."""
+
+### standard library import
+from math import ceil, sqrt
+
+
+### third-party imports
+
+from PIL.Image import (
+                 Resampling,
+                 Transform,
+                 new as new_image,
+                 open as pil_open_image,
+               )
+
+
+### local import
+from .region import get_union, use_tiles
+
+
+
+def get_reduce_factor(size, max_pixels):
+    """Return smallest factor reducing size to max_pixels or less.
+
+    The factor is meant to be used with Image.reduce(), which
+    rounds the resulting width and height up. Returns 1 if
+    size is already within the budget.
+    """
+    width, height = size
+
+    factor = max(ceil(sqrt(width * height / max_pixels)), 1)
+
+    while ceil(width / factor) * ceil(height / factor) > max_pixels:
+        factor += 1
+
+    return factor
+
+
+def reduce_image(image, factor):
+    """Return image reduced by factor.
+
+    Box reduction is used, except for palette and bilevel
+    images, whose pixel values can't be averaged, and which
+    keep the top-left pixel of each factor x factor block
+    instead.
+
+    Either way, each pixel of the result only depends on its
+    block, so horizontal bands starting at multiples of the
+    factor can be reduced separately (see decode_in_bands()).
+    Image.resize() with nearest neighbour doesn't have this
+    property when the size isn't a multiple of the factor,
+    since its step is then smaller than the factor.
+    """
+    if image.mode not in ('P', '1'):
+        return image.reduce(factor)
+
+    width, height = image.size
+
+    ### Pillow samples the pixel at (x + 0.5) * factor + offset
+    ### for each column x of the result (rows likewise), so this
+    ### offset makes it sample the first pixel of the block
+
+    offset = 0.5 - factor / 2
+
+    return image.transform(
+             (ceil(width / factor), ceil(height / factor)),
+             Transform.AFFINE,
+             (factor, 0, offset, 0, factor, offset),
+             Resampling.NEAREST,
+           )
+
+
+def decode_in_bands(filepath, factor):
+    """Return image from filepath reduced by factor, band by band.
+
+    Meant for files whose pixels are split in tiles or strips
+    (see region.restrict_to_region()). Horizontal bands of the
+    image are decoded and reduced one at a time, so the full
+    size image is never allocated. Band heights are multiples
+    of the factor, so reducing them separately gives the same
+    result as reducing the whole image.
+
+    The file is opened and its tiles are read only once; the
+    same image object is then made to decode the tiles of each
+    band in turn.
+    """
+    # pil_open_image = PIL.Image.open
+
+    ### the image is opened from a file object we own, so Pillow
+    ### doesn't close it after decoding the first band
+
+    with open(filepath, 'rb') as file, \
+         pil_open_image(file, 'r') as temp_image:
+
+        mode = temp_image.mode
+        width, height = temp_image.size
+
+        ## tiles sorted by their vertical position, then by their
+        ## horizontal one
+
+        tiles = sorted(
+                  temp_image.tile,
+                  key=lambda tile: (tile[1][1], tile[1][0]),
+                )
+
+        ## use the height of the tallest tile, so bands usually
+        ## contain whole tiles
+
+        tile_height = max(y1 - y0 for _, (_, y0, _, y1), _, _ in tiles)
+        band_height = ceil(tile_height / factor) * factor
+
+        image = new_image(
+                  mode,
+                  (ceil(width / factor), ceil(height / factor)),
+                )
+
+        if mode == 'P':
+            image.putpalette(temp_image.getpalette())
+
+        image.info = temp_image.info.copy()
+
+        ## walk the tiles with two cursors: tiles before the first
+        ## one end above the current band and tiles from the last
+        ## one onwards start below it
+
+        first = last = 0
+
+        for upper in range(0, height, band_height):
+
+            lower = min(upper + band_height, height)
+
+            while first < len(tiles) and tiles[first][1][3] <= upper:
+                first += 1
+
+            while last < len(tiles) and tiles[last][1][1] < lower:
+                last += 1
+
+            band_tiles = [
+              tile
+              for tile in tiles[first:last]
+              if tile[1][3] > upper
+            ]
+
+            ## bands without tiles are left blank, as they would be
+            ## if the whole image was decoded
+
+            if not band_tiles:
+                continue
+
+            ## decode the tiles of the band, whose area may extend
+            ## above or below it, and keep just the band
+
+            area = get_union(tile[1] for tile in band_tiles)
+            left, top, _, _ = area
+
+            use_tiles(temp_image, band_tiles, area)
+            temp_image.fp = file
+
+            band_box = (-left, upper - top, width - left, lower - top)
+            band = reduce_image(temp_image.crop(band_box), factor)
+
+            image.paste(band, (0, upper // factor))
+
+    return image
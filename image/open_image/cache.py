@@ -0,0 +1,194 @@
+"""Facility for caching decoded images."""
+
+### standard library imports
+
+from os import PathLike, stat
+
+from pathlib import Path
+
+from collections import OrderedDict
+
+from threading import Lock
+
+
+### default maximum number of bytes the pixels of the cached
+### images can add up to (1 GiB)
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def get_image_bytes(image):
+    """Return number of bytes used by the pixels of image.
+
+    Pillow stores multi-band images using 4 bytes per pixel
+    even when the mode has less than 4 bands (RGB or LA, for
+    instance).
+    """
+    mode = image.mode
+
+    if mode in ('1', 'L', 'P'):
+        pixel_size = 1
+
+    elif mode.startswith('I;16'):
+        pixel_size = 2
+
+    else:
+        pixel_size = 4
+
+    return image.width * image.height * pixel_size
+
+
+def share_image(image):
+    """Return read-only handle sharing pixels of image.
+
+    Both the image and the handle are marked as read-only, so
+    whichever of them is changed first by paste(), putpixel(),
+    ImageDraw, etc. copies the pixels before changing them,
+    leaving the other one untouched. Writing through the pixel
+    access object returned by load() raises ValueError instead,
+    though, since Pillow doesn't copy the pixels for it; code
+    doing that must call copy() first.
+    """
+    image.load()
+
+    handle = image._new(image.im)
+
+    image.readonly = 1
+    handle.readonly = 1
+
+    return handle
+
+
+def get_file_key(filepath, *options):
+    """Return key identifying current contents of file.
+
+    The key is made of the resolved path, modification time
+    and size of the file, followed by the given options. If
+    filepath isn't a path (a file object, for instance), None
+    is returned, since such contents can't be identified.
+    """
+    if not isinstance(filepath, (str, PathLike)):
+        return None
+
+    path = Path(filepath).resolve()
+    stat_result = stat(path)
+
+    return (
+        str(path),
+        stat_result.st_mtime_ns,
+        stat_result.st_size,
+        *options,
+    )
+
+
+class ImageCache:
+    """LRU cache of images bounded by bytes of their pixels.
+
+    The cache is safe to use from multiple threads. Images
+    are stored as given and retrieved as read-only handles
+    (see share_image()), so callers can't corrupt the cached
+    images nor each other's.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+
+        self.max_bytes = max_bytes
+
+        self.images = OrderedDict()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self.key_hits = {}
+
+        self.lock = Lock()
+
+    def get(self, key):
+        """Return handle for image stored under key or None."""
+        with self.lock:
+
+            try:
+                image = self.images[key]
+
+            except KeyError:
+
+                self.misses += 1
+                return None
+
+            self.images.move_to_end(key)
+
+            self.hits += 1
+            self.key_hits[key] = self.key_hits.get(key, 0) + 1
+
+            return share_image(image)
+
+    def put(self, key, image):
+        """Store image under key and return handle for it.
+
+        Least recently used images are evicted until the
+        pixels of the cached images fit in the maximum number
+        of bytes. Images larger than such maximum aren't
+        cached at all.
+        """
+        handle = share_image(image)
+        image_bytes = get_image_bytes(image)
+
+        if image_bytes > self.max_bytes:
+            return handle
+
+        with self.lock:
+
+            if key in self.images:
+
+                self.total_bytes -= (
+                    get_image_bytes(self.images.pop(key))
+                )
+
+                self.key_hits.pop(key, None)
+
+            self.images[key] = image
+            self.total_bytes += image_bytes
+
+            while self.total_bytes > self.max_bytes:
+
+                evicted_key, evicted_image = (
+                  self.images.popitem(last=False)
+                )
+
+                self.total_bytes -= get_image_bytes(evicted_image)
+                self.key_hits.pop(evicted_key, None)
+
+        return handle
+
+    def clear(self):
+        """Remove all images from the cache."""
+        with self.lock:
+
+            self.images.clear()
+            self.key_hits.clear()
+
+            self.total_bytes = 0
+
+    def get_hits(self, key):
+        """Return number of times image under key was retrieved.
+
+        Only retrievals since the image was stored are counted.
+        """
+        with self.lock:
+            return self.key_hits.get(key, 0)
+
+    def get_info(self):
+        """Return dict with statistics about the cache."""
+        with self.lock:
+
+            return {
+              'hits'        : self.hits,
+              'misses'      : self.misses,
+              'images'      : len(self.images),
+              'total_bytes' : self.total_bytes,
+              'max_bytes'   : self.max_bytes,
+            }
+
+
+### process-wide cache used by the open_image node
+DECODED_IMAGES = ImageCache()
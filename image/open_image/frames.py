@@ -0,0 +1,115 @@
+"""Facility for accessing frames of multi-frame image files."""
+
+### standard library import
+from collections import OrderedDict
+
+
+### third-party import
+from PIL.Image import open as pil_open_image
+
+
+### local import
+from .cache import share_image
+
+
+
+class FrameSequence:
+    """Frames of an image file, decoded on demand.
+
+    Works for any format Pillow can seek in (GIF, APNG, TIFF,
+    WebP, ICO, etc.). Single-frame files have a single frame.
+
+    Each frame is decoded only when accessed, either by index
+    or by iterating over the sequence. Iterating keeps the file
+    open and seeks from frame to frame, so memory use doesn't
+    depend on the number of frames.
+
+    If cache_size is higher than 0, up to that many decoded
+    frames are kept (the most recently used ones), so that
+    accessing them again doesn't decode them again. Frames
+    are retrieved from the cache as copy-on-write handles.
+    """
+
+    def __init__(self, filepath, cache_size=0):
+
+        self.filepath = filepath
+        self.cache_size = cache_size
+
+        self.frame_count = None
+        self.cached_frames = OrderedDict()
+
+    def __len__(self):
+        """Return number of frames, reading it if needed."""
+        if self.frame_count is None:
+
+            # pil_open_image = PIL.Image.open
+
+            with pil_open_image(self.filepath, 'r') as image:
+                self.frame_count = getattr(image, 'n_frames', 1)
+
+        return self.frame_count
+
+    def __getitem__(self, index):
+        """Return frame at index (negative ones count from end)."""
+        frame_count = len(self)
+
+        if index < 0:
+            index += frame_count
+
+        if not 0 <= index < frame_count:
+            raise IndexError("frame index out of range")
+
+        frame = self.get_cached_frame(index)
+
+        if frame is None:
+
+            with pil_open_image(self.filepath, 'r') as image:
+                frame = self.decode_frame(image, index)
+
+        return frame
+
+    def __iter__(self):
+        """Yield each frame in order."""
+        with pil_open_image(self.filepath, 'r') as image:
+
+            for index in range(getattr(image, 'n_frames', 1)):
+
+                frame = self.get_cached_frame(index)
+
+                if frame is None:
+                    frame = self.decode_frame(image, index)
+
+                yield frame
+
+    def get_cached_frame(self, index):
+        """Return handle for frame from cache or None."""
+        try:
+            frame = self.cached_frames[index]
+
+        except KeyError:
+            return None
+
+        self.cached_frames.move_to_end(index)
+
+        return share_image(frame)
+
+    def decode_frame(self, image, index):
+        """Seek to frame, decode and return it, caching if needed.
+
+        The frame is copied, since seeking to another frame
+        may change the pixels of the image in place (frames of
+        GIF files are composited over the previous ones, for
+        instance).
+        """
+        image.seek(index)
+        frame = image.copy()
+
+        if self.cache_size < 1:
+            return frame
+
+        self.cached_frames[index] = frame
+
+        while len(self.cached_frames) > self.cache_size:
+            self.cached_frames.popitem(last=False)
+
+        return share_image(frame)
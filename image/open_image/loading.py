@@ -0,0 +1,219 @@
+"""Facility for loading images from files."""
+
+### standard library imports
+
+from collections import deque
+
+from concurrent.futures import ThreadPoolExecutor
+
+from itertools import islice
+
+from math import ceil
+
+
+### third-party import
+from PIL.Image import open as pil_open_image
+
+
+### local imports
+
+from .reduction import reduce_on_load
+
+from .region import (
+                restrict_to_region,
+                scale_box,
+                get_box_size,
+              )
+
+from .budget import (
+                get_reduce_factor,
+                reduce_image,
+                decode_in_bands,
+              )
+
+
+
+def read_size(filepath):
+    """Return size of image from header of file."""
+    # pil_open_image = PIL.Image.open
+
+    with pil_open_image(filepath, 'r') as image:
+        return image.size
+
+
+def detach_image(image):
+    """Decode image and return new image sharing its pixels.
+
+    The new image doesn't reference the file the original one
+    was opened from, so such file can be closed while the new
+    image is used.
+
+    Unlike Image.copy(), the pixels aren't duplicated, so peak
+    memory usage stays at the size of the decoded image, rather
+    than twice that size while the copy is made.
+    """
+    image.load()
+
+    detached_image = image._new(image.im)
+    detached_image.readonly = image.readonly
+
+    return detached_image
+
+
+def decode_image(
+      filepath,
+      target_size=None,
+      crop_box=None,
+      max_pixels=0,
+    ):
+    """Return image from filepath with its pixels decoded.
+
+    The file is closed before returning. See the open_image
+    node for a description of the parameters.
+    """
+    # pil_open_image = PIL.Image.open
+
+    with pil_open_image(filepath, 'r') as temp_image:
+
+        original_size = temp_image.size
+
+        ### if the image (or region) exceeds the pixel budget,
+        ### ask the decoder to reduce it as needed; it may not
+        ### be able to reduce it enough, in which case the
+        ### image is reduced further after being decoded
+
+        factor = 1
+
+        if max_pixels:
+
+            factor = get_reduce_factor(
+                       (
+                         original_size
+                         if crop_box is None
+                         else get_box_size(crop_box)
+                       ),
+                       max_pixels,
+                     )
+
+            if factor > 1:
+
+                budget_size = tuple(
+                  ceil(length / factor)
+                  for length in original_size
+                )
+
+                target_size = (
+                  budget_size
+                  if target_size is None
+                  else tuple(map(min, target_size, budget_size))
+                )
+
+        if target_size is not None:
+            temp_image = reduce_on_load(temp_image, target_size)
+
+        ### if the decoder couldn't reduce the image and its
+        ### pixels are split in tiles or strips, it is decoded
+        ### in bands further below, so the full size image is
+        ### never allocated
+
+        in_bands = (
+          factor > 1
+          and crop_box is None
+          and temp_image.size == original_size
+          and len(temp_image.tile) > 1
+        )
+
+        if in_bands:
+            image = None
+
+        ### if there's no region to crop, decode the image and
+        ### detach it from the file, so the file can be closed
+
+        elif crop_box is None:
+            image = detach_image(temp_image)
+
+        ### otherwise, decode only the tiles overlapping the
+        ### region, if possible, and retrieve the region (which
+        ### is a copy as well)
+
+        else:
+
+            if temp_image.size != original_size:
+
+                crop_box = scale_box(
+                             crop_box,
+                             original_size,
+                             temp_image.size,
+                           )
+
+            relative_box = restrict_to_region(temp_image, crop_box)
+
+            image = temp_image.crop(relative_box or crop_box)
+
+        ### close the image in case reduce_on_load() opened the
+        ### file again (the one opened above is closed anyway)
+
+        temp_image.close()
+
+    if in_bands:
+        image = decode_in_bands(filepath, factor)
+
+    ### if needed, reduce the image further to fit the budget
+
+    if max_pixels:
+
+        factor = get_reduce_factor(image.size, max_pixels)
+
+        if factor > 1:
+            image = reduce_image(image, factor)
+
+    return image
+
+
+def iter_decoded_images(
+      paths,
+      prefetch=4,
+      max_workers=None,
+      target_size=None,
+    ):
+    """Yield images decoded from paths, in the same order.
+
+    Images are decoded on a thread pool, up to prefetch images
+    ahead of the one being consumed, so only about prefetch + 1
+    decoded images exist at any time no matter how many paths
+    there are. Pillow releases the GIL while decoding, so
+    images are decoded in parallel.
+
+    If the generator is closed before being exhausted, pending
+    decodings are cancelled.
+    """
+    path_iterator = iter(paths)
+    pending_futures = deque()
+
+    executor = ThreadPoolExecutor(max_workers)
+
+    try:
+
+        for path in islice(path_iterator, max(prefetch, 1)):
+
+            pending_futures.append(
+              executor.submit(decode_image, path, target_size)
+            )
+
+        while pending_futures:
+
+            image = pending_futures.popleft().result()
+
+            ## submit next path, if any, before yielding, so it is
+            ## decoded while the consumer processes the image
+
+            for path in islice(path_iterator, 1):
+
+                pending_futures.append(
+                  executor.submit(decode_image, path, target_size)
+                )
+
+            yield image
+
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,168 @@
+"""Facility for loading images over memory-mapped files."""
+
+### standard library imports
+
+from os import PathLike
+
+from mmap import mmap, ACCESS_READ
+
+
+### third-party imports
+
+from PIL.Image import (
+                 frombuffer,
+                 open as pil_open_image,
+               )
+
+
+### number of bytes per pixel of the modes whose pixels Pillow
+### can use directly from a buffer (see PIL.Image._MAPMODES);
+###
+### modes like RGB aren't included because Pillow stores them
+### with 4 bytes per pixel, while files store 3 bytes
+BYTES_PER_PIXEL = {
+  'L'     : 1,
+  'P'     : 1,
+  'I;16'  : 2,
+  'I;16L' : 2,
+  'I;16B' : 2,
+  'RGBX'  : 4,
+  'RGBA'  : 4,
+  'CMYK'  : 4,
+}
+
+
+def get_raw_layout(tiles, mode, size):
+    """Return (offset, stride, orientation) of raw pixels or None.
+
+    The tiles are the ones listed by Pillow for an image whose
+    pixels weren't loaded yet. None is returned unless the
+    pixels are stored uncompressed, in the same layout Pillow
+    uses in memory, in a single contiguous block of the file
+    (which is the case for 8-bit binary PGM files, 8-bit BMP
+    files and uncompressed TIFF files using strips, for
+    instance).
+    """
+    if mode not in BYTES_PER_PIXEL or not tiles:
+        return None
+
+    width, height = size
+    first_offset = tiles[0][2]
+
+    expected_y = 0
+    layout = None
+
+    for decoder_name, extents, offset, args in tiles:
+
+        if decoder_name != 'raw':
+            return None
+
+        if isinstance(args, str):
+            args = (args,)
+
+        rawmode, stride, orientation = (*args, 0, 1)[:3]
+
+        if rawmode != mode:
+            return None
+
+        if not stride:
+            stride = width * BYTES_PER_PIXEL[mode]
+
+        ## each tile must span the whole width and start right
+        ## where the previous one ended, both in the image and
+        ## in the file
+
+        x0, y0, x1, y1 = extents
+
+        if (
+          (x0, x1) != (0, width)
+          or y0 != expected_y
+          or offset != first_offset + y0 * stride
+          or (layout is not None and layout[1:] != (stride, orientation))
+        ):
+            return None
+
+        ## bottom-up rows can only be handled in a single tile
+
+        if orientation != 1 and len(tiles) > 1:
+            return None
+
+        layout = first_offset, stride, orientation
+        expected_y = y1
+
+    return layout if expected_y == height else None
+
+
+def map_image(filepath):
+    """Return image whose pixels are memory-mapped from filepath.
+
+    The pixels are paged in from the file by the operating
+    system when accessed, instead of read beforehand, and can
+    be shared among processes mapping the same file. The image
+    is read-only: changing it makes Pillow copy the pixels to
+    memory first.
+
+    None is returned if filepath isn't a path or the pixels
+    aren't stored in a layout that can be mapped (see
+    get_raw_layout()), in which case the file must be decoded
+    normally.
+    """
+    if not isinstance(filepath, (str, PathLike)):
+        return None
+
+    # pil_open_image = PIL.Image.open
+
+    with pil_open_image(filepath, 'r') as header_image:
+
+        mode = header_image.mode
+        size = header_image.size
+
+        layout = get_raw_layout(header_image.tile, mode, size)
+
+        info = header_image.info.copy()
+
+        palette = (
+          header_image.palette.copy()
+          if mode == 'P'
+          else None
+        )
+
+    if layout is None:
+        return None
+
+    offset, stride, orientation = layout
+
+    ### map the file; the map stays alive for as long as the
+    ### image referencing it, even after the file is closed
+
+    with open(filepath, 'rb') as file:
+        mapped_file = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+    ### if the file is truncated, let the decoder deal with it
+
+    if offset + stride * size[1] > len(mapped_file):
+
+        mapped_file.close()
+        return None
+
+    image = frombuffer(
+              mode,
+              size,
+              memoryview(mapped_file)[offset:],
+              'raw',
+              mode,
+              stride,
+              orientation,
+            )
+
+    image.info = info
+
+    ### replace the default palette set by frombuffer(); it is
+    ### copied to the core image when the image is loaded
+
+    if palette is not None:
+
+        palette.dirty = 1
+        image.palette = palette
+
+    return image
@@ -0,0 +1,52 @@
+"""Facility for listing image files."""
+
+### standard library imports
+
+from pathlib import Path
+
+from glob import glob
+
+
+### third-party import
+from PIL.Image import registered_extensions
+
+
+
+def get_image_paths(pattern, recursive=False):
+    """Return sorted list of paths of image files.
+
+    Parameters
+    ==========
+
+    pattern (string or pathlib.Path)
+        either the path of a directory, in which case all files
+        inside it whose extensions are recognized by Pillow are
+        listed, or a glob pattern, in which case all files
+        matching it are listed ('**' can be used to match any
+        number of subdirectories).
+    recursive (bool)
+        if True and pattern is a directory, files inside its
+        subdirectories are listed as well.
+    """
+    path = Path(pattern)
+
+    if path.is_dir():
+
+        extensions = registered_extensions()
+
+        return sorted(
+          str(file_path)
+          for file_path in (
+            path.rglob('*')
+            if recursive
+            else path.iterdir()
+          )
+          if file_path.suffix.lower() in extensions
+          and file_path.is_file()
+        )
+
+    return sorted(
+      str_path
+      for str_path in glob(str(pattern), recursive=True)
+      if Path(str_path).is_file()
+    )
@@ -0,0 +1,256 @@
+"""Facility for decoding images at reduced resolutions."""
+
+### standard library import
+from struct import error as StructError, unpack
+
+
+### third-party import
+from PIL.Image import open as pil_open_image
+
+
+### maximum reduction factor we ask the JPEG 2000 decoder for
+### when the number of decomposition levels of the file can't
+### be read;
+###
+### each factor halves the image, and codestreams are encoded
+### with 5 decomposition levels by default, so asking for more
+### than that would make openjpeg fail for most files
+MAX_JPEG2000_REDUCE = 5
+
+### JPEG 2000 markers read from the main header of codestreams
+### (start of codestream, image and tile size, coding style
+### default, coding style component and start of tile-part)
+
+SOC = 0xFF4F
+SIZ = 0xFF51
+COD = 0xFF52
+COC = 0xFF53
+SOT = 0xFF90
+
+
+def find_jpeg2000_codestream(file):
+    """Move file to the start of its codestream, if possible.
+
+    JP2 files store the codestream in a 'jp2c' box; raw
+    codestreams (.j2k files) start right away. Returns False
+    if no codestream is found.
+    """
+    if file.read(2) == b'\xff\x4f':
+
+        file.seek(-2, 1)
+        return True
+
+    file.seek(0)
+
+    while True:
+
+        header = file.read(8)
+
+        if len(header) < 8:
+            return False
+
+        length, box_type = unpack('>I4s', header)
+        header_length = 8
+
+        ## a length of 1 means the actual length follows, as
+        ## a 64-bit integer; 0 means the box extends to the
+        ## end of the file
+
+        if length == 1:
+
+            length, = unpack('>Q', file.read(8))
+            header_length = 16
+
+        if box_type == b'jp2c':
+            return True
+
+        if length < header_length:
+            return False
+
+        file.seek(length - header_length, 1)
+
+
+def get_jpeg2000_levels(image):
+    """Return number of decomposition levels of JPEG 2000 image.
+
+    Those are read from the COD and COC markers in the main
+    header of the codestream; if components have different
+    numbers of levels, the smallest one is returned. Returns
+    None if the header can't be read.
+
+    The number of levels is the largest factor the decoder can
+    reduce the image by. Tile-parts may override it, though,
+    which isn't checked, since it would require reading the
+    whole file.
+    """
+    file = image.fp
+
+    if file is None:
+        return None
+
+    position = file.tell()
+
+    try:
+
+        file.seek(0)
+
+        if not find_jpeg2000_codestream(file):
+            return None
+
+        marker, = unpack('>H', file.read(2))
+
+        if marker != SOC:
+            return None
+
+        levels = []
+        component_count = 0
+
+        while True:
+
+            marker, length = unpack('>HH', file.read(4))
+
+            if marker == SOT or length < 2:
+                break
+
+            segment = file.read(length - 2)
+
+            ## the number of components is needed to know
+            ## the size of their indices in COC segments
+
+            if marker == SIZ:
+                component_count, = unpack('>H', segment[34:36])
+
+            ## COD segment: coding style (1 byte), progression
+            ## order (1), number of layers (2), multiple
+            ## component transformation (1) and number of
+            ## decomposition levels (1)
+
+            elif marker == COD:
+                levels.append(segment[5])
+
+            ## COC segment: index of the component (1 byte, or 2
+            ## if there are more than 256 components), coding
+            ## style (1) and number of decomposition levels (1)
+
+            elif marker == COC:
+
+                index_size = 1 if component_count < 257 else 2
+                levels.append(segment[index_size + 1])
+
+        return min(levels) if levels else None
+
+    except (OSError, IndexError, StructError):
+        return None
+
+    finally:
+        file.seek(position)
+
+
+def load_reduced(image, factor):
+    """Return JPEG 2000 image loaded reduced by factor, if possible.
+
+    If the decoder fails, which happens when the factor exceeds
+    the decomposition levels of a tile-part, the file is opened
+    again and smaller factors are tried, returning the new
+    image. If none works, the image returned is left unloaded,
+    at full size. Images not opened from a path can't be opened
+    again, so the error is raised.
+    """
+    while factor:
+
+        image.reduce = factor
+
+        try:
+            image.load()
+
+        except OSError:
+
+            ## the decoder closed the file and changed the size,
+            ## so the file is opened again from its path (which
+            ## Pillow only records for images opened from paths)
+
+            if not image.filename:
+                raise
+
+            # pil_open_image = PIL.Image.open
+            image = pil_open_image(image.filename, 'r')
+
+            factor -= 1
+
+        else:
+            break
+
+    return image
+
+
+def reduce_on_load(image, target_size):
+    """Return image made to decode close to target_size, if possible.
+
+    Must be called before the pixels are decoded. The decoded
+    image is never smaller than target_size, so it can still
+    be downscaled to the exact size afterwards.
+
+    The image given is usually returned, but JPEG 2000 images
+    may be opened again (see load_reduced()), in which case the
+    new image is returned and must be used (and closed) instead.
+
+    Only JPEG (via Image.draft()) and JPEG 2000 (via the
+    'reduce' attribute of the plugin) support this. Other
+    formats are left untouched, that is, they are decoded
+    at full size.
+
+    Parameters
+    ==========
+
+    image (PIL.ImageFile.ImageFile)
+        image object returned by PIL.Image.open, whose pixels
+        weren't loaded yet.
+    target_size (2-tuple of integers)
+        minimum width and height wanted for the decoded image.
+    """
+    target_width, target_height = target_size
+
+    ### JPEG decoders can scale the image by 1/2, 1/4 or 1/8
+    ### while decoding it; Pillow picks the largest scale that
+    ### keeps the image at least as large as the requested size
+
+    if image.format == 'JPEG':
+        image.draft(None, target_size)
+
+    ### JPEG 2000 files store the image as a series of
+    ### resolution levels, each one half the size of the
+    ### previous, so we pick the smallest level that is
+    ### still at least as large as the requested size
+
+    elif image.format == 'JPEG2000':
+
+        width, height = image.size
+        factor = 0
+
+        ## the factor can't exceed the number of decomposition
+        ## levels of the file
+
+        levels = get_jpeg2000_levels(image)
+        max_factor = MAX_JPEG2000_REDUCE if levels is None else levels
+
+        while factor < max_factor:
+
+            power = 1 << (factor + 1)
+            adjust = power >> 1
+
+            if (
+                (width + adjust) // power < target_width
+                or (height + adjust) // power < target_height
+            ):
+                break
+
+            factor += 1
+
+        ## the plugin only updates the size of the image when
+        ## loading it, so we load it right away, otherwise
+        ## the size reported before decoding would be wrong
+
+        if factor:
+            image = load_reduced(image, factor)
+
+    return image
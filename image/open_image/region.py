@@ -0,0 +1,168 @@
+"""Facility for decoding regions of images."""
+
+
+def get_box_size(box):
+    """Return width and height of box."""
+    left, upper, right, lower = box
+    return right - left, lower - upper
+
+
+def get_union(boxes):
+    """Return smallest box containing all boxes."""
+    x0s, y0s, x1s, y1s = zip(*boxes)
+    return min(x0s), min(y0s), max(x1s), max(y1s)
+
+
+def overlaps(box_a, box_b):
+    """Return True if boxes share any area."""
+    return (
+      box_a[0] < box_b[2]
+      and box_b[0] < box_a[2]
+      and box_a[1] < box_b[3]
+      and box_b[1] < box_a[3]
+    )
+
+
+def move_tile(tile, x_offset, y_offset):
+    """Return copy of tile with extents moved by offsets.
+
+    Recent Pillow versions represent tiles as named tuples
+    (ImageFile._Tile), older ones as plain tuples, so we keep
+    the same type.
+    """
+    decoder_name, (x0, y0, x1, y1), offset, args = tile
+
+    moved_tile = (
+      decoder_name,
+      (x0 + x_offset, y0 + y_offset, x1 + x_offset, y1 + y_offset),
+      offset,
+      args,
+    )
+
+    return (
+      tile._make(moved_tile)
+      if hasattr(tile, '_make')
+      else moved_tile
+    )
+
+
+def use_tiles(image, tiles, area):
+    """Make image decode only the given tiles, covering area.
+
+    The tiles are moved so the area starts at the origin and
+    the image is resized to the area, which must contain all
+    the tiles. Its pixels, if already decoded, are discarded,
+    so the image can be decoded again, as long as its file is
+    still open.
+
+    TIFF images allocate their pixels with the size stored in
+    their _tile_size attribute rather than their size, so it
+    is updated as well.
+    """
+    left, upper, right, lower = area
+
+    image.tile = [
+      move_tile(tile, -left, -upper)
+      for tile in tiles
+    ]
+
+    image._size = (right - left, lower - upper)
+
+    if hasattr(image, '_tile_size'):
+        image._tile_size = image._size
+
+    image.im = None
+
+
+def restrict_to_region(image, box):
+    """Make image decode only tiles overlapping box, if possible.
+
+    Must be called before the pixels are decoded. Files whose
+    pixels are split in several tiles or strips (tiled or
+    striped TIFF files, for instance) can have only the tiles
+    overlapping the box decoded. The image is changed so that
+    it covers just the area of such tiles, and its size is
+    updated accordingly.
+
+    Returns the box relative to that area, which must be used
+    to crop the image after decoding it, or None if the file
+    stores its pixels as a single tile (as most compressed
+    formats do), in which case the image is left untouched
+    and must be decoded entirely before being cropped.
+
+    Parameters
+    ==========
+
+    image (PIL.ImageFile.ImageFile)
+        image object returned by PIL.Image.open, whose pixels
+        weren't loaded yet.
+    box (4-tuple of integers)
+        left, upper, right and lower coordinates of the region.
+    """
+    tiles = image.tile
+
+    if len(tiles) < 2:
+        return None
+
+    ### find the area covered by the tiles overlapping the box;
+    ###
+    ### since tiles overlapping that area must be decoded as
+    ### well (otherwise parts of the area would be left blank),
+    ### we keep growing the area until no tile overlaps it
+    ### partially
+
+    area = box
+
+    while True:
+
+        area_tiles = [
+          tile
+          for tile in tiles
+          if overlaps(tile[1], area)
+        ]
+
+        if not area_tiles:
+            raise ValueError("crop box doesn't overlap the image")
+
+        new_area = get_union(tile[1] for tile in area_tiles)
+
+        if new_area == area:
+            break
+
+        area = new_area
+
+    ### update the tiles and size of the image so it covers
+    ### only the area
+
+    use_tiles(image, area_tiles, area)
+
+    left, upper, _, _ = area
+
+    ### return the box relative to the area
+
+    return (
+      box[0] - left,
+      box[1] - upper,
+      box[2] - left,
+      box[3] - upper,
+    )
+
+
+def scale_box(box, original_size, size):
+    """Return box scaled from original_size to size.
+
+    Used to map a box given for the full image to an image
+    decoded at reduced resolution. The scaled box is grown
+    outwards to whole pixels.
+    """
+    x_scale = size[0] / original_size[0]
+    y_scale = size[1] / original_size[1]
+
+    left, upper, right, lower = box
+
+    return (
+      int(left * x_scale),
+      int(upper * y_scale),
+      min(-int(-right * x_scale), size[0]),
+      min(-int(-lower * y_scale), size[1]),
+    )
@@ -0,0 +1,80 @@
+
+### standard library import
+from collections.abc import Iterator
+
+
+### local imports
+
+from ..open_image.paths import get_image_paths
+
+from ..open_image.loading import iter_decoded_images
+
+
+### function definition
+
+def open_image_batch(
+
+      pattern: str = '.',
+
+      prefetch: 'natural_number' = 4,
+
+      max_workers: 'natural_number' = 0,
+
+      target_size: 'python_literal' = None,
+
+    ) -> [
+
+      {'name' : 'images', 'type': Iterator},
+      {'name' : 'paths',  'type': tuple},
+      {'name' : 'count',  'type': int},
+
+    ]:
+    """Return generator of images decoded from many files.
+
+    The images are yielded lazily, in the same order as the
+    paths, while the next ones are decoded in the background
+    by a pool of threads. Since Pillow releases the GIL while
+    decoding, this uses all available cores, and since only
+    a bounded number of images are decoded ahead, memory stays
+    flat no matter how many files there are.
+
+    Parameters
+    ==========
+
+    pattern (string)
+        either the path of a directory, in which case all image
+        files inside it (not recursively) are opened, or a glob
+        pattern like 'photos/**/*.jpg', in which case all files
+        matching it are opened. Paths are sorted.
+    prefetch (natural number)
+        number of images decoded ahead of the one being
+        consumed. Values below 1 are treated as 1.
+    max_workers (natural number)
+        number of threads decoding images. If 0, Python
+        chooses it based on the number of cores available.
+    target_size (None or 2-tuple of integers)
+        same as the target_size of the open_image node.
+
+    Returns
+    =======
+    A dict with the images generator, the tuple of paths of
+    the files (in the same order as the images) and the number
+    of files.
+    """
+    paths = tuple(get_image_paths(pattern))
+
+    images = iter_decoded_images(
+               paths,
+               prefetch,
+               max_workers or None,
+               target_size,
+             )
+
+    return {
+      'images' : images,
+      'paths'  : paths,
+      'count'  : len(paths),
+    }
+
+### function aliasing
+main_callable = open_image_batch
@@ -0,0 +1,119 @@
+
+### standard library imports
+
+from array import array
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+### third-party import
+from PIL.Image import open as pil_open_image
+
+
+### local import
+from ..open_image.paths import get_image_paths
+
+
+
+### support function
+
+def read_header(filepath):
+    """Return (width, height, mode) from header of image file.
+
+    Returns None if the file can't be opened and identified.
+    """
+    # pil_open_image = PIL.Image.open
+
+    try:
+
+        with pil_open_image(filepath, 'r') as image:
+            return (*image.size, image.mode)
+
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+### function definition
+
+def probe_images(
+
+      pattern: str = '.',
+
+      max_workers: 'natural_number' = 0,
+
+      skip_errors: bool = False,
+
+    ) -> [
+
+      {'name' : 'paths',   'type': tuple},
+      {'name' : 'widths',  'type': array},
+      {'name' : 'heights', 'type': array},
+      {'name' : 'modes',   'type': tuple},
+      {'name' : 'count',   'type': int},
+
+    ]:
+    """Return width, height and mode of many image files.
+
+    Only the headers of the files are read, no pixels are
+    decoded, and files are read concurrently by a pool of
+    threads. The results are returned as columns, that is,
+    one sequence per property, all in the same order as the
+    paths, instead of one Image object per file.
+
+    Parameters
+    ==========
+
+    pattern (string)
+        either the path of a directory or a glob pattern, as
+        in the open_image_batch node.
+    max_workers (natural number)
+        number of threads reading headers. If 0, Python
+        chooses it based on the number of cores available.
+    skip_errors (bool)
+        if True, files that can't be opened and identified are
+        left out of the results; otherwise an error is raised.
+
+    Returns
+    =======
+    A dict with the tuple of paths, arrays of unsigned integers
+    holding the widths and heights, the tuple of modes and the
+    number of files probed.
+    """
+    paths = get_image_paths(pattern)
+
+    with ThreadPoolExecutor(max_workers or None) as executor:
+        headers = list(executor.map(read_header, paths))
+
+    ### gather results in columns
+
+    probed_paths = []
+    widths = array('L')
+    heights = array('L')
+    modes = []
+
+    for path, header in zip(paths, headers):
+
+        if header is None:
+
+            if skip_errors:
+                continue
+
+            raise OSError(f"cannot identify image file {path!r}")
+
+        width, height, mode = header
+
+        probed_paths.append(path)
+        widths.append(width)
+        heights.append(height)
+        modes.append(mode)
+
+    return {
+      'paths'   : tuple(probed_paths),
+      'widths'  : widths,
+      'heights' : heights,
+      'modes'   : tuple(modes),
+      'count'   : len(probed_paths),
+    }
+
+### function aliasing
+main_callable = probe_images
@@ -1,14 +1,143 @@
 
+### third-party import
 from PIL.Image import Image
 
+
+### local imports
+
+from .writer import BACKGROUND_WRITER
+
+from .saving import save
+
+
+### function definition
+
 def save_image(
 
       image  : Image,
       path   : 'image_path' = '.',
       format : 'python_literal' = None,
 
+      background: bool = False,
+
+      png_threads: 'natural_number' = 0,
+
+      time_budget: float = 0.0,
+
+      size_budget: 'natural_number' = 0,
+
+      skip_unchanged: bool = False,
+
+      store_directory: str = '',
+
     ):
+    """Save image to path.
+
+    Parameters
+    ==========
+
+    image (PIL.Image.Image)
+        image to be saved.
+    path (string or pathlib.Path)
+        path of the file to be created.
+    format (None or string)
+        format of the file (like 'PNG' or 'JPEG'). If None,
+        it is determined from the extension of the path.
+    background (bool)
+        if True, the image is handed to a pool of threads which
+        encodes and writes it in the background, and the node
+        returns right away, so the rest of the graph runs while
+        the file is written. A copy of the image is saved, so
+        changing the image afterwards doesn't change the file.
+        If too many images are already waiting to be saved, the
+        node waits for one of them to be saved first, so memory
+        use stays bounded. Use the flush_image_saves node to
+        wait for all images to be saved. Errors are raised by
+        the next save_image call using this option or by
+        flush_image_saves.
+    png_threads (natural number)
+        if higher than 0 and the image is saved as PNG, it is
+        compressed by this many threads, which is several
+        times faster for large images. Only L, LA, RGB and
+        RGBA images are supported (others are saved normally)
+        and no metadata is saved. If 0, Pillow's PNG encoder
+        is used.
+    time_budget (float)
+        if higher than 0, the number of seconds the encoding
+        should take. For PNG, JPEG and WebP files, the encoder
+        options (compression level, quality, subsampling,
+        method, etc.) are chosen automatically to give the
+        best quality (or, for PNG, the smallest file) that is
+        expected to be encoded within the budget. Expectations
+        come from encoding a small sample of the image and
+        from the time taken by previous saves. Other formats
+        use the default options.
+    size_budget (natural number)
+        if higher than 0, the number of bytes the file should
+        have. Works like time_budget, giving the best quality
+        (or, for PNG, the fastest encoding) expected to fit
+        in the budget. Both budgets can be used together.
+    skip_unchanged (bool)
+        if True, a fingerprint of the pixels, mode, palette and
+        metadata of the image and of the settings above is
+        recorded in a hidden file next to the saved file
+        ('.<file name>.fingerprint'). Saving again with the
+        same fingerprint while the saved file is unchanged
+        (same size and modification time) does nothing, which
+        avoids encoding and writing identical files again.
+        Otherwise, the image is saved to a temporary file in
+        the same directory, which then atomically replaces the
+        file, so other processes never see partially written
+        files.
+    store_directory (string)
+        if given, the path of a content-addressed store where
+        files are kept once, named after the hash of their
+        contents. The file is encoded in memory and only
+        written to the store if it isn't there yet. The path
+        then becomes a reflink to the stored file if the file
+        system supports it (Btrfs and XFS, for instance), or a
+        hard link otherwise, so identical files saved to several
+        paths take disk space only once; paths on other file
+        systems than the store get copies. Stored files are
+        read-only and saving to a hard-linked path replaces it,
+        so the stored file is never changed. Use the
+        image_store_stats node to see how many bytes were saved.
+    """
+    ### if requested, save the image in the background;
+    ###
+    ### a copy of the image is saved, so that nodes changing the
+    ### image in place while it is saved don't change the pixels
+    ### being saved; the image itself is left as is (marking it
+    ### as read-only would make writes through Image.load()
+    ### fail, since Pillow doesn't copy the pixels for those)
+
+    if background:
+
+        BACKGROUND_WRITER.submit(
+          save,
+          image.copy(),
+          path,
+          format,
+          png_threads,
+          time_budget,
+          size_budget,
+          skip_unchanged,
+          store_directory,
+        )
+
+    ### otherwise save it right away
+
+    else:
 
-    image.save(path, format=format)
+        save(
+          image,
+          path,
+          format,
+          png_threads,
+          time_budget,
+          size_budget,
+          skip_unchanged,
+          store_directory,
+        )
 
 main_callable = save_image
@@ -0,0 +1,161 @@
+"""Facility for skipping writes of unchanged images.
+
+A fingerprint (hash) of the image and of the settings used to
+save it is stored in a hidden file next to the saved file. When
+saving again, if the fingerprint is the same and the saved file
+wasn't changed in the meantime, there's no need to encode and
+write it again.
+"""
+
+### standard library imports
+
+from os import remove, replace, stat
+
+from pathlib import Path
+
+from hashlib import blake2b
+
+from json import dumps, loads
+
+from secrets import token_hex
+
+from contextlib import contextmanager
+
+
+### keys of Image.info which Pillow may write to files
+SAVED_INFO_KEYS = ('dpi', 'exif', 'icc_profile', 'transparency')
+
+### number of bytes of pixels hashed at once
+HASHED_BAND_BYTES = 1 << 22
+
+
+def get_fingerprint(image, settings):
+    """Return hex digest of image and settings used to save it.
+
+    Parameters
+    ==========
+
+    image (PIL.Image.Image)
+        image to be saved; its mode, size, palette, metadata
+        which Pillow may save and pixels are hashed.
+    settings (tuple)
+        anything else affecting the saved file, like the format
+        and encoder options; its repr() is hashed.
+    """
+    hasher = blake2b(digest_size=20)
+
+    width, height = image.size
+
+    header = (
+      image.mode,
+      image.size,
+      image.getpalette() if image.mode in ('P', 'PA') else None,
+      tuple(
+        (key, image.info[key])
+        for key in SAVED_INFO_KEYS
+        if key in image.info
+      ),
+      settings,
+    )
+
+    hasher.update(repr(header).encode())
+
+    ### hash the pixels in bands, so only a small part of them
+    ### is copied to a bytes object at a time
+
+    row_bytes = max(len(image.crop((0, 0, width, 1)).tobytes()), 1)
+    band_height = max(HASHED_BAND_BYTES // row_bytes, 1)
+
+    for upper in range(0, height, band_height):
+
+        hasher.update(
+          image.crop(
+            (0, upper, width, min(upper + band_height, height))
+          ).tobytes()
+        )
+
+    return hasher.hexdigest()
+
+
+def get_fingerprint_path(path):
+    """Return path of hidden file storing fingerprint of path."""
+    path = Path(path)
+    return path.with_name(f'.{path.name}.fingerprint')
+
+
+def is_unchanged(path, fingerprint):
+    """Return True if file in path was saved with fingerprint.
+
+    The size and modification time of the file must also match
+    the ones recorded when it was saved, so files changed or
+    replaced by other means are saved again.
+    """
+    try:
+
+        record = loads(get_fingerprint_path(path).read_text())
+        stat_result = stat(path)
+
+    except (OSError, ValueError):
+        return False
+
+    return record == {
+      'fingerprint' : fingerprint,
+      'size'        : stat_result.st_size,
+      'mtime_ns'    : stat_result.st_mtime_ns,
+    }
+
+
+def write_fingerprint(path, fingerprint):
+    """Record fingerprint of file in path, which was just saved."""
+    stat_result = stat(path)
+
+    get_fingerprint_path(path).write_text(
+      dumps(
+        {
+          'fingerprint' : fingerprint,
+          'size'        : stat_result.st_size,
+          'mtime_ns'    : stat_result.st_mtime_ns,
+        }
+      )
+    )
+
+
+@contextmanager
+def replacing_atomically(path):
+    """Yield temporary path which replaces path when done.
+
+    The temporary file is created in the same directory, with
+    the same extension (so Pillow can tell the format from it),
+    and renamed over path when the block finishes, so readers
+    never see a partially written file. If the block raises an
+    error, the temporary file is removed instead.
+    """
+    path = Path(path)
+
+    ### create the temporary file with a random name; unlike
+    ### tempfile.mkstemp(), open() honours the umask, so the file
+    ### gets the same permissions a file saved normally would
+
+    while True:
+
+        temp_path = path.with_name(
+                      f'.{path.name}.{token_hex(4)}{path.suffix}'
+                    )
+
+        try:
+            open(temp_path, 'xb').close()
+
+        except FileExistsError:
+            continue
+
+        break
+
+    try:
+        yield temp_path
+
+    except BaseException:
+
+        remove(temp_path)
+        raise
+
+    replace(temp_path, path)
@@ -0,0 +1,247 @@
+"""Facility for writing PNG files using multiple threads.
+
+Works like pigz: the pixels are split in bands of rows which
+are filtered and compressed as independent pieces of a single
+deflate stream, by a pool of threads. zlib releases the GIL
+while compressing, so the bands are compressed in parallel.
+"""
+
+### standard library imports
+
+from os import cpu_count
+
+from struct import pack
+
+from zlib import (
+          DEFLATED,
+          MAX_WBITS,
+          Z_FINISH,
+          Z_SYNC_FLUSH,
+          adler32,
+          compressobj,
+          crc32,
+        )
+
+from contextlib import nullcontext
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+### third-party import
+from PIL.ImageChops import subtract_modulo
+
+
+### PNG signature
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+### PNG color type and number of bytes per pixel of each
+### supported mode (all of them with 8 bits per sample)
+
+MODE_DATA = {
+  'L'    : (0, 1),
+  'RGB'  : (2, 3),
+  'LA'   : (4, 2),
+  'RGBA' : (6, 4),
+}
+
+### "Up" filter type; each byte is stored as the difference
+### from the byte above it, which compresses well and, unlike
+### adaptive filtering, can be computed for whole bands at
+### once by Pillow
+UP_FILTER = b'\x02'
+
+### minimum number of bytes per band; smaller bands compress
+### worse, since each band starts with an empty history
+MIN_BAND_BYTES = 1 << 20
+
+### modulus used by adler-32 checksums
+ADLER_BASE = 65521
+
+
+def can_write_png(image):
+    """Return True if mode of image is supported."""
+    return image.mode in MODE_DATA
+
+
+def get_zlib_header(compress_level):
+    """Return 2-byte zlib header for compression level."""
+    if compress_level < 2:
+        level_flag = 0
+
+    elif compress_level < 6:
+        level_flag = 1
+
+    elif compress_level == 6:
+        level_flag = 2
+
+    else:
+        level_flag = 3
+
+    cmf = 0x78
+    flg = level_flag << 6
+    flg += 31 - (cmf * 256 + flg) % 31
+
+    return bytes((cmf, flg))
+
+
+def combine_adler32(adler_a, adler_b, length_b):
+    """Return adler-32 of data a + b from checksums of a and b.
+
+    Port of adler32_combine() from zlib, which Python doesn't
+    expose.
+    """
+    remainder = length_b % ADLER_BASE
+
+    sum_a = adler_a & 0xFFFF
+    sum_b = (remainder * sum_a) % ADLER_BASE
+
+    sum_a += (adler_b & 0xFFFF) + ADLER_BASE - 1
+    sum_b += (adler_a >> 16) + (adler_b >> 16) + ADLER_BASE - remainder
+
+    sum_a %= ADLER_BASE
+    sum_b %= ADLER_BASE
+
+    return sum_a | (sum_b << 16)
+
+
+def make_chunk(chunk_type, data):
+    """Return bytes of PNG chunk."""
+    return (
+      pack('>I', len(data))
+      + chunk_type
+      + data
+      + pack('>I', crc32(data, crc32(chunk_type)))
+    )
+
+
+def compress_band(image, upper, lower, compress_level, is_last):
+    """Return (compressed data, adler-32, length) of band of rows.
+
+    The rows are filtered before being compressed. The data
+    is a piece of a raw deflate stream, which ends in a byte
+    boundary so that pieces can be concatenated (the last one
+    also ends the stream).
+    """
+    width = image.width
+
+    ### filter the rows by subtracting the rows above them;
+    ### cropping above the image gives a row of zeros, as the
+    ### PNG specification requires for the first row
+
+    filtered_bytes = subtract_modulo(
+                       image.crop((0, upper, width, lower)),
+                       image.crop((0, upper - 1, width, lower - 1)),
+                     ).tobytes()
+
+    ### prefix each row with the filter type
+
+    row_size = len(filtered_bytes) // (lower - upper)
+
+    data = UP_FILTER + UP_FILTER.join(
+      filtered_bytes[start:start + row_size]
+      for start in range(0, len(filtered_bytes), row_size)
+    )
+
+    ### compress
+
+    compressor = compressobj(compress_level, DEFLATED, -MAX_WBITS)
+
+    compressed_data = (
+      compressor.compress(data)
+      + compressor.flush(Z_FINISH if is_last else Z_SYNC_FLUSH)
+    )
+
+    return compressed_data, adler32(data), len(data)
+
+
+def write_png(image, file, compress_level=6, threads=None):
+    """Write image to file as PNG, compressing it in parallel.
+
+    Only L, LA, RGB and RGBA images are supported (see
+    can_write_png()). No metadata is written.
+
+    Parameters
+    ==========
+
+    image (PIL.Image.Image)
+        image to be saved.
+    file (string, pathlib.Path or a file object)
+        path of the file to be created or a file object opened
+        in binary mode, which is written to but not closed.
+    compress_level (integer from 0 to 9)
+        zlib compression level, like the one accepted by Pillow
+        when saving PNG files.
+    threads (None or positive integer)
+        number of threads used; if None, Python chooses it
+        based on the number of cores available.
+    """
+    color_type, pixel_size = MODE_DATA[image.mode]
+    width, height = image.size
+
+    image.load()
+
+    ### split the rows in bands, a few per thread, so threads
+    ### finishing early can take more bands
+
+    threads = threads or cpu_count() or 1
+
+    row_bytes = width * pixel_size + 1
+
+    rows_per_band = max(
+      -(-MIN_BAND_BYTES // row_bytes),
+      -(-height // (threads * 4)),
+      1,
+    )
+
+    bands = [
+      (upper, min(upper + rows_per_band, height))
+      for upper in range(0, height, rows_per_band)
+    ]
+
+    ### compress the bands, writing them as IDAT chunks in order
+
+    file_context = (
+      nullcontext(file)
+      if hasattr(file, 'write')
+      else open(file, 'wb')
+    )
+
+    with ThreadPoolExecutor(threads) as executor, file_context as file:
+
+        futures = [
+          executor.submit(
+            compress_band,
+            image,
+            upper,
+            lower,
+            compress_level,
+            lower == height,
+          )
+          for upper, lower in bands
+        ]
+
+        file.write(PNG_SIGNATURE)
+
+        file.write(
+          make_chunk(
+            b'IHDR',
+            pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0),
+          )
+        )
+
+        checksum = adler32(b'')
+        data_prefix = get_zlib_header(compress_level)
+
+        for future in futures:
+
+            compressed_data, band_checksum, length = future.result()
+
+            checksum = combine_adler32(checksum, band_checksum, length)
+
+            file.write(make_chunk(b'IDAT', data_prefix + compressed_data))
+            data_prefix = b''
+
+        ## the zlib stream ends with the adler-32 of the data
+
+        file.write(make_chunk(b'IDAT', pack('>I', checksum)))
+        file.write(make_chunk(b'IEND', b''))
@@ -0,0 +1,211 @@
+"""Facility for choosing encoder options within budgets.
+
+Each supported format has a few profiles, that is, sets of
+encoder options passed to Image.save(). To pick one, a sample
+of the image is encoded with each profile to estimate the
+size of the file and the time taken to encode it.
+
+The time each profile takes per pixel doesn't depend much on
+the image, so it is kept in a process-wide cost model and
+refined with the time actually taken by each save. Sizes do
+depend on the image, so they are always estimated from the
+sample.
+"""
+
+### standard library imports
+
+from io import BytesIO
+
+from time import perf_counter
+
+from threading import Lock
+
+
+### profiles of each format, from the best quality to the
+### worst; lossless formats have a single quality level, so
+### their profiles are ordered from the fastest to the slowest
+### (which usually produces the smallest files)
+
+PROFILES = {
+
+  'PNG': (
+    {'compress_level': 1},
+    {'compress_level': 3},
+    {'compress_level': 6},
+    {'compress_level': 9},
+    {'compress_level': 9, 'optimize': True},
+  ),
+
+  'JPEG': (
+    {'quality': 95, 'subsampling': 0, 'optimize': True},
+    {'quality': 95, 'subsampling': 0},
+    {'quality': 90, 'subsampling': 1},
+    {'quality': 85, 'subsampling': 2},
+    {'quality': 75, 'subsampling': 2},
+    {'quality': 60, 'subsampling': 2},
+  ),
+
+  'WEBP': (
+    {'quality': 90, 'method': 6},
+    {'quality': 90, 'method': 4},
+    {'quality': 80, 'method': 4},
+    {'quality': 80, 'method': 0},
+    {'quality': 65, 'method': 4},
+    {'quality': 65, 'method': 0},
+  ),
+
+}
+
+LOSSLESS_FORMATS = frozenset(('PNG',))
+
+### maximum width and height of the sample encoded to
+### calibrate estimates
+SAMPLE_SIZE = 256
+
+### weight given to new measurements when updating the cost
+### model (exponential moving average)
+COST_UPDATE_WEIGHT = 0.5
+
+
+### cost model mapping (format, profile index) to the seconds
+### taken to encode each pixel
+
+SECONDS_PER_PIXEL = {}
+
+COST_MODEL_LOCK = Lock()
+
+
+def update_cost_model(format, index, seconds, pixels):
+    """Update estimated seconds per pixel of profile."""
+    measured_cost = seconds / max(pixels, 1)
+    key = (format, index)
+
+    with COST_MODEL_LOCK:
+
+        current_cost = SECONDS_PER_PIXEL.get(key)
+
+        SECONDS_PER_PIXEL[key] = (
+          measured_cost
+          if current_cost is None
+          else (
+            COST_UPDATE_WEIGHT * measured_cost
+            + (1 - COST_UPDATE_WEIGHT) * current_cost
+          )
+        )
+
+
+def get_sample(image):
+    """Return central region of image to be used as sample."""
+    width, height = image.size
+
+    sample_width = min(width, SAMPLE_SIZE)
+    sample_height = min(height, SAMPLE_SIZE)
+
+    left = (width - sample_width) // 2
+    upper = (height - sample_height) // 2
+
+    return image.crop(
+             (left, upper, left + sample_width, upper + sample_height)
+           )
+
+
+def estimate_costs(image, format, measure_sizes):
+    """Return list of (seconds, bytes) estimated for each profile.
+
+    The sample is only encoded with the profiles missing from
+    the cost model, unless measure_sizes is True, in which
+    case it is encoded with all profiles. Estimated sizes are
+    None when not measured.
+    """
+    pixels = image.width * image.height
+
+    sample = None
+    estimates = []
+
+    for index, options in enumerate(PROFILES[format]):
+
+        cost = SECONDS_PER_PIXEL.get((format, index))
+        estimated_size = None
+
+        if cost is None or measure_sizes:
+
+            if sample is None:
+
+                sample = get_sample(image)
+                sample.load()
+
+                sample_pixels = sample.width * sample.height
+
+            stream = BytesIO()
+
+            start = perf_counter()
+            sample.save(stream, format=format, **options)
+            seconds = perf_counter() - start
+
+            if cost is None:
+
+                update_cost_model(format, index, seconds, sample_pixels)
+                cost = SECONDS_PER_PIXEL[(format, index)]
+
+            estimated_size = stream.tell() * pixels / sample_pixels
+
+        estimates.append((cost * pixels, estimated_size))
+
+    return estimates
+
+
+def choose_profile(image, format, time_budget=0, size_budget=0):
+    """Return index of profile to use for image, within budgets.
+
+    Among the profiles estimated to fit in the budgets (the
+    ones given as 0 are ignored), the one with the best quality
+    is chosen. Ties are broken by choosing the smallest file
+    when there's a time budget, or the fastest profile
+    otherwise.
+
+    If no profile fits, the fastest one is chosen when there's
+    a time budget, otherwise the one producing the smallest
+    file.
+
+    Returns None if the format has no profiles.
+    """
+    if format not in PROFILES:
+        return None
+
+    estimates = estimate_costs(image, format, bool(size_budget))
+
+    ### list indices of profiles within budgets
+
+    fitting_indices = [
+      index
+      for index, (seconds, size) in enumerate(estimates)
+      if (not time_budget or seconds <= time_budget)
+      and (not size_budget or size <= size_budget)
+    ]
+
+    ### if no profile fits, fall back to the fastest one or the
+    ### one producing the smallest file
+
+    if not fitting_indices:
+
+        return min(
+          range(len(estimates)),
+          key=lambda index: estimates[index][0 if time_budget else 1],
+        )
+
+    ### profiles are ordered by quality, so the first fitting
+    ### one has the best quality; for lossless formats, however,
+    ### all have the same quality, so we choose the profile
+    ### producing the smallest file (which is usually the
+    ### slowest one) when there's a time budget and the
+    ### fastest one otherwise
+
+    if format in LOSSLESS_FORMATS:
+
+        return (
+          fitting_indices[-1]
+          if time_budget
+          else fitting_indices[0]
+        )
+
+    return fitting_indices[0]
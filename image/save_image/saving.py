@@ -0,0 +1,215 @@
+"""Facility for saving images."""
+
+### standard library imports
+
+from os import stat
+
+from pathlib import Path
+
+from time import perf_counter
+
+
+### third-party import
+from PIL.Image import registered_extensions
+
+
+### local imports
+
+from .pngwriter import can_write_png, write_png
+
+from .profiles import PROFILES, choose_profile, update_cost_model
+
+from .store import save_to_store
+
+from .fingerprints import (
+                      get_fingerprint,
+                      is_unchanged,
+                      replacing_atomically,
+                      write_fingerprint,
+                    )
+
+
+
+def get_format(path, format=None):
+    """Return format name for path, like Pillow would choose it.
+
+    If format is given, it is returned in uppercase. Otherwise
+    the format is determined from the extension of the path.
+    None is returned if the extension isn't recognized.
+    """
+    if format is not None:
+        return format.upper()
+
+    return registered_extensions().get(Path(path).suffix.lower())
+
+
+def is_hard_link(path):
+    """Return True if path is a file with more than one link."""
+    try:
+        return stat(path).st_nlink > 1
+
+    except (OSError, TypeError, ValueError):
+        return False
+
+
+def save(
+      image,
+      path,
+      format=None,
+      png_threads=0,
+      time_budget=0,
+      size_budget=0,
+      skip_unchanged=False,
+      store_directory='',
+    ):
+    """Save image to path.
+
+    See the save_image node for a description of the
+    parameters.
+    """
+    format_name = get_format(path, format)
+
+    ### if requested, skip the file if it was saved before from
+    ### the same image and settings
+
+    if skip_unchanged:
+
+        fingerprint = get_fingerprint(
+                        image,
+                        (format_name, bool(png_threads), time_budget, size_budget),
+                      )
+
+        if is_unchanged(path, fingerprint):
+            return
+
+    ### if requested, save the image to the content-addressed
+    ### store (the format must be given explicitly, since the
+    ### image is encoded to a file object)
+
+    if store_directory:
+
+        save_to_store(
+          store_directory,
+          path,
+          lambda stream: encode(
+                           image,
+                           stream,
+                           format_name,
+                           format_name,
+                           png_threads,
+                           time_budget,
+                           size_budget,
+                         ),
+        )
+
+    ### if skipping unchanged files, save the image to a
+    ### temporary file which then replaces the file
+
+    elif skip_unchanged:
+
+        with replacing_atomically(path) as temp_path:
+
+            encode(
+              image,
+              temp_path,
+              format,
+              format_name,
+              png_threads,
+              time_budget,
+              size_budget,
+            )
+
+    ### if the path is a hard link (made by earlier versions of
+    ### the store, for instance), save to a temporary file which
+    ### then replaces the path as well, so the other links to
+    ### the file aren't changed
+
+    elif is_hard_link(path):
+
+        with replacing_atomically(path) as temp_path:
+
+            encode(
+              image,
+              temp_path,
+              format,
+              format_name,
+              png_threads,
+              time_budget,
+              size_budget,
+            )
+
+    ### otherwise just save the image
+
+    else:
+
+        encode(
+          image,
+          path,
+          format,
+          format_name,
+          png_threads,
+          time_budget,
+          size_budget,
+        )
+
+    ### record the fingerprint of the saved file
+
+    if skip_unchanged:
+        write_fingerprint(path, fingerprint)
+
+
+def encode(
+      image,
+      path,
+      format,
+      format_name,
+      png_threads,
+      time_budget,
+      size_budget,
+    ):
+    """Encode image and write it to path."""
+    ### if there are budgets, choose the encoder options
+
+    profile_index = (
+      choose_profile(image, format_name, time_budget, size_budget)
+      if time_budget or size_budget
+      else None
+    )
+
+    options = (
+      {}
+      if profile_index is None
+      else PROFILES[format_name][profile_index]
+    )
+
+    ### save the image
+
+    if (
+      png_threads
+      and format_name == 'PNG'
+      and can_write_png(image)
+    ):
+
+        write_png(
+          image,
+          path,
+          options.get('compress_level', 6),
+          png_threads,
+        )
+
+    else:
+
+        start = perf_counter()
+
+        image.save(path, format=format, **options)
+
+        ## use the time taken to refine the cost model
+
+        if profile_index is not None:
+
+            update_cost_model(
+              format_name,
+              profile_index,
+              perf_counter() - start,
+              image.width * image.height,
+            )
@@ -0,0 +1,205 @@
+"""Facility for saving images to a content-addressed store.
+
+Encoded files are stored once, named after the hash of their
+bytes, in subdirectories of the store named after the first
+two characters of the hash (like git objects). The requested
+paths then become reflinks to the stored files when the file
+system supports them (copy-on-write clones, as in Btrfs and
+XFS), or hard links to them otherwise, so identical outputs
+only take disk space once. Paths on other file systems than
+the store get copies, which take space of their own.
+
+Stored files are made read-only, so hard-linked paths can't
+be written to in place either; the save_image node replaces
+hard-linked paths instead of writing through them, so saving
+to a path never changes the stored file.
+
+Statistics about the saves are kept in a JSON file in the
+store.
+"""
+
+### standard library imports
+
+from os import chmod, link, remove, replace
+
+from io import BytesIO
+
+from pathlib import Path
+
+from hashlib import blake2b
+
+from json import dumps, loads
+
+from shutil import copyfile
+
+from threading import Lock
+
+try:
+    from fcntl import ioctl
+
+except ImportError:
+    ioctl = None
+
+
+### local import
+from .fingerprints import replacing_atomically
+
+
+### request for cloning files (FICLONE from linux/fs.h)
+FICLONE = 0x40049409
+
+### name of the file, in the store, keeping its statistics
+STATS_NAME = 'stats.json'
+
+### statistics recorded
+STATS_KEYS = (
+  'saves',
+  'blobs_stored',
+  'bytes_requested',
+  'bytes_stored',
+  'bytes_saved',
+  'bytes_copied',
+)
+
+STATS_LOCK = Lock()
+
+
+def get_blob_path(store_directory, data, suffix):
+    """Return path in store for encoded data."""
+    digest = blake2b(data, digest_size=20).hexdigest()
+    return Path(store_directory) / digest[:2] / (digest[2:] + suffix)
+
+
+def clone_file(source_path, target_path):
+    """Create target_path as a reflink (clone) of source_path.
+
+    Raises OSError if the file system doesn't support it.
+    """
+    if ioctl is None:
+        raise OSError("reflinks aren't supported on this platform")
+
+    with open(source_path, 'rb') as source_file, \
+         open(target_path, 'xb') as target_file:
+
+        try:
+            ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+
+        except OSError:
+
+            target_file.close()
+            remove(target_path)
+            raise
+
+
+def link_file(source_path, target_path):
+    """Make target_path point to contents of source_path.
+
+    A reflink is tried first, then a hard link (which fails
+    across file systems), then a copy. The target is replaced
+    atomically. Returns True if the target shares its storage
+    with the source, that is, if it isn't a copy.
+    """
+    target_path = Path(target_path)
+
+    temp_path = target_path.with_name(f'.{target_path.name}.link')
+
+    if temp_path.exists():
+        remove(temp_path)
+
+    is_shared = True
+
+    try:
+        clone_file(source_path, temp_path)
+
+    except OSError:
+
+        try:
+            link(source_path, temp_path)
+
+        except OSError:
+
+            copyfile(source_path, temp_path)
+            is_shared = False
+
+    replace(temp_path, target_path)
+
+    return is_shared
+
+
+def update_stats(store_directory, **increments):
+    """Add increments to statistics of store."""
+    stats_path = Path(store_directory) / STATS_NAME
+
+    with STATS_LOCK:
+
+        stats = get_stats(store_directory)
+
+        for key, increment in increments.items():
+            stats[key] += increment
+
+        with replacing_atomically(stats_path) as temp_path:
+            temp_path.write_text(dumps(stats, indent=1))
+
+
+def get_stats(store_directory):
+    """Return dict with statistics of store."""
+    try:
+        stats = loads((Path(store_directory) / STATS_NAME).read_text())
+
+    except (OSError, ValueError):
+        stats = {}
+
+    return {key: stats.get(key, 0) for key in STATS_KEYS}
+
+
+def save_to_store(store_directory, path, encode_to):
+    """Save file to store and make path point to it.
+
+    Parameters
+    ==========
+
+    store_directory (string or pathlib.Path)
+        directory of the store; created if needed.
+    path (string or pathlib.Path)
+        path where the file must appear.
+    encode_to (callable)
+        receives a binary file object and writes the encoded
+        file to it.
+    """
+    path = Path(path)
+
+    stream = BytesIO()
+    encode_to(stream)
+
+    data = stream.getbuffer()
+    blob_path = get_blob_path(store_directory, data, path.suffix.lower())
+
+    ### store the file, unless it is already there
+
+    is_new = not blob_path.exists()
+
+    if is_new:
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with replacing_atomically(blob_path) as temp_path:
+
+            temp_path.write_bytes(data)
+            chmod(temp_path, 0o444)
+
+    ### make path point to the contents of the stored file;
+    ###
+    ### only outputs sharing storage with the stored file save
+    ### space; copies take space of their own
+
+    is_shared = link_file(blob_path, path)
+
+    update_stats(
+      store_directory,
+      saves=1,
+      blobs_stored=int(is_new),
+      bytes_requested=len(data),
+      bytes_stored=len(data) if is_new else 0,
+      bytes_saved=len(data) if is_shared and not is_new else 0,
+      bytes_copied=0 if is_shared else len(data),
+    )
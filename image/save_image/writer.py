@@ -0,0 +1,133 @@
+"""Facility for saving images in the background."""
+
+### standard library imports
+
+from os import cpu_count
+
+from atexit import register as register_at_exit
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from threading import BoundedSemaphore, Lock
+
+
+
+class BackgroundWriter:
+    """Pool of threads running save operations in the background.
+
+    At most max_pending operations can be submitted and not yet
+    finished at any given time. Submitting more blocks until one
+    of them finishes, so memory used by images waiting to be
+    saved stays bounded when they are produced faster than they
+    can be saved (backpressure).
+
+    Errors raised by the operations are kept and raised on the
+    next call to submit() or flush().
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+
+        max_workers = max_workers or min(4, cpu_count() or 1)
+
+        self.max_workers = max_workers
+        self.slots = BoundedSemaphore(max_pending or 2 * max_workers)
+
+        self.executor = None
+
+        self.pending_futures = set()
+        self.errors = []
+
+        self.lock = Lock()
+
+    def submit(self, function, *args, **kwargs):
+        """Run function(*args, **kwargs) in the background."""
+        self.raise_errors()
+
+        self.slots.acquire()
+
+        with self.lock:
+
+            ## the threads are only created when first needed
+
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.max_workers)
+
+            future = self.executor.submit(function, *args, **kwargs)
+            self.pending_futures.add(future)
+
+        future.add_done_callback(self.finish)
+
+    def finish(self, future):
+        """Release slot used by future and keep its error, if any.
+
+        The error is only kept if the future is still pending,
+        since flush() may have kept it already.
+        """
+        with self.lock:
+
+            if future in self.pending_futures:
+
+                self.pending_futures.discard(future)
+                self.keep_error(future)
+
+        self.slots.release()
+
+    def keep_error(self, future):
+        """Keep error raised by finished future, if any."""
+        error = future.exception()
+
+        if error is not None:
+            self.errors.append(error)
+
+    def flush(self):
+        """Wait for all operations to finish and raise errors.
+
+        Waiting threads may be woken up before the callbacks of
+        the futures run, so the errors of the futures waited for
+        are kept here rather than by finish().
+        """
+        with self.lock:
+            pending_futures = tuple(self.pending_futures)
+
+        wait(pending_futures)
+
+        with self.lock:
+
+            for future in pending_futures:
+
+                if future in self.pending_futures:
+
+                    self.pending_futures.discard(future)
+                    self.keep_error(future)
+
+        self.raise_errors()
+
+    def raise_errors(self):
+        """Raise first error kept, if any, forgetting all errors.
+
+        The number of other errors, if any, is noted in the
+        message of a RuntimeError raised from the first one.
+        """
+        with self.lock:
+
+            errors = self.errors
+            self.errors = []
+
+        if not errors:
+            return
+
+        if len(errors) == 1:
+            raise errors[0]
+
+        raise RuntimeError(
+          f"{len(errors)} background saves failed;"
+          " the first error is shown above"
+        ) from errors[0]
+
+
+### writer used by the save_image node; pending saves are
+### waited for when the interpreter exits, so they aren't lost
+
+BACKGROUND_WRITER = BackgroundWriter()
+
+register_at_exit(BACKGROUND_WRITER.flush)
@@ -0,0 +1,179 @@
+
+### standard library import
+from concurrent.futures import ThreadPoolExecutor
+
+
+### third-party imports
+
+from PIL.Image import Image, Resampling
+
+
+### local import
+from ..save_image.saving import get_format, save
+
+
+### formats which can't store an alpha channel
+FORMATS_WITHOUT_ALPHA = frozenset(('JPEG', 'BMP', 'PPM', 'EPS'))
+
+
+### support functions
+
+def get_fitting_size(size, max_size):
+    """Return size scaled down to fit max_size, keeping aspect.
+
+    Sizes already fitting (or max_size None) are returned as is.
+    """
+    width, height = size
+
+    if max_size is None:
+        return size
+
+    max_width, max_height = max_size
+
+    scale = min(max_width / width, max_height / height, 1)
+
+    return (
+      max(round(width * scale), 1),
+      max(round(height * scale), 1),
+    )
+
+
+def normalize_mode(image):
+    """Return image converted to RGB or RGBA, if needed."""
+    if image.mode in ('RGB', 'RGBA'):
+        return image
+
+    has_alpha = (
+      'A' in image.getbands()
+      or 'transparency' in image.info
+    )
+
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+### function definition
+
+def save_image_variants(
+
+      image: Image,
+
+      targets: 'python_literal' = (),
+
+      max_workers: 'natural_number' = 0,
+
+    ):
+    """Save image to several files, each with its format and size.
+
+    The image is converted to RGB or RGBA only once, and the
+    resized versions are produced in decreasing size order,
+    each one from the previous (larger) one, which is much
+    cheaper than resizing the full image each time. Images
+    are encoded and written by a pool of threads while smaller
+    versions are still being produced.
+
+    Parameters
+    ==========
+
+    image (PIL.Image.Image)
+        image to be saved.
+    targets (list of tuples)
+        each tuple contains the path of a file to be created
+        (a path alone can be given instead of a tuple),
+        optionally followed by the format (None to determine
+        it from the extension, like in save_image) and by the
+        maximum size (a 2-tuple with the maximum width and
+        height, or None to keep the original size). Images are
+        never enlarged, and keep their aspect ratio. Example:
+
+        [
+          ('full.png',),
+          ('proxy.jpg', None, (2048, 2048)),
+          ('thumb.webp', 'WEBP', (256, 256)),
+        ]
+
+        Images saved to formats which can't store an alpha
+        channel (like JPEG) are converted to RGB.
+    max_workers (natural number)
+        number of threads encoding images. If 0, Python
+        chooses it based on the number of cores available.
+    """
+    ### decode the image in this thread, before the threads saving
+    ### it and the resizes below access its pixels, since images
+    ### loaded lazily (see open_image) can't be decoded by several
+    ### threads at once
+
+    image.load()
+
+    ### normalize targets, calculating the size of each one
+
+    normalized_image = normalize_mode(image)
+
+    normalized_targets = []
+
+    for target in targets:
+
+        if isinstance(target, str):
+            target = (target,)
+
+        path, format, max_size = (*target, None, None)[:3]
+
+        normalized_targets.append(
+          (
+            path,
+            format,
+            get_fitting_size(normalized_image.size, max_size),
+          )
+        )
+
+    ### produce images in decreasing size order, each one
+    ### resized from the previous one, submitting them to be
+    ### saved as soon as they are ready
+
+    sizes = sorted(
+              {size for _, _, size in normalized_targets},
+              key=lambda size: size[0] * size[1],
+              reverse=True,
+            )
+
+    with ThreadPoolExecutor(max_workers or None) as executor:
+
+        futures = []
+        level = normalized_image
+
+        for size in sizes:
+
+            if level.size != size:
+                level = level.resize(size, Resampling.LANCZOS)
+
+            ## versions without alpha are shared among targets
+            ## of the same size
+
+            rgb_level = None
+
+            for path, format, target_size in normalized_targets:
+
+                if target_size != size:
+                    continue
+
+                level_to_save = level
+
+                if (
+                  level.mode == 'RGBA'
+                  and get_format(path, format) in FORMATS_WITHOUT_ALPHA
+                ):
+
+                    if rgb_level is None:
+                        rgb_level = level.convert('RGB')
+
+                    level_to_save = rgb_level
+
+                futures.append(
+                  executor.submit(save, level_to_save, path, format)
+                )
+
+        ## raise errors, if any
+
+        for future in futures:
+            future.result()
+
+main_callable = save_image_variants
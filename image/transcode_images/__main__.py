@@ -0,0 +1,267 @@
+
+### standard library imports
+
+from os import replace
+
+from json import dumps, loads
+
+from pathlib import Path
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+### local imports
+
+from ..open_image.paths import get_image_paths
+
+from .transcoding import transcode
+
+
+### name of the file, in the output directory, which records
+### the files transcoded
+MANIFEST_NAME = '.transcode_manifest.json'
+
+
+### support functions
+
+def load_manifest(path):
+    """Return dict stored in manifest file, or empty dict."""
+    try:
+        return loads(path.read_text())
+
+    except (OSError, ValueError):
+        return {}
+
+
+def store_manifest(path, manifest):
+    """Store manifest dict in file, replacing it atomically."""
+    temp_path = path.with_name(path.name + '.tmp')
+    temp_path.write_text(dumps(manifest, indent=1, sort_keys=True))
+
+    replace(temp_path, path)
+
+
+### function definition
+
+def transcode_images(
+
+      source_directory: str = '.',
+
+      output_directory: str = '.',
+
+      extension: str = '.png',
+
+      format: 'python_literal' = None,
+
+      recursive: bool = True,
+
+      max_workers: 'natural_number' = 0,
+
+    ) -> [
+
+      {'name' : 'transcoded', 'type': int},
+      {'name' : 'skipped',    'type': int},
+      {'name' : 'excluded',   'type': int},
+
+    ]:
+    """Transcode image files, skipping the ones already done.
+
+    Each image file in the source directory is decoded and
+    saved to the output directory with the given extension,
+    keeping its relative path (with the extension replaced).
+
+    A manifest in the output directory ('.transcode_manifest
+    .json') records, for each file, the modification time,
+    size and hash of the source file, along with the output
+    settings. Files are only transcoded again if their output
+    is missing, the settings changed or the source changed.
+    When the modification time or size of the source changed,
+    its hash is compared as well, so files touched but not
+    changed aren't transcoded again either.
+
+    When the output directory is inside the source directory,
+    files within it are excluded, since they are outputs of
+    previous runs; so are files which would be replaced by
+    their own output. Excluded files are counted separately.
+
+    Files are processed by a pool of processes. Files which
+    can't be transcoded don't stop the others; once all are
+    processed, the manifest is stored and the error is raised
+    (a RuntimeError naming the files, if several failed). The
+    manifest is also stored when the job is interrupted, so
+    the work already done isn't lost.
+
+    Parameters
+    ==========
+
+    source_directory (string)
+        directory containing the files to be transcoded.
+    output_directory (string)
+        directory where transcoded files are saved.
+    extension (string)
+        extension of transcoded files, like '.png' or '.webp'.
+    format (None or string)
+        format of transcoded files; if None, it is determined
+        from the extension.
+    recursive (bool)
+        whether to transcode files in subdirectories of the
+        source directory as well.
+    max_workers (natural number)
+        number of processes transcoding files. If 0, the number
+        of cores available is used.
+
+    Returns
+    =======
+    A dict with the number of files transcoded, skipped and
+    excluded.
+    """
+    source_directory = Path(source_directory)
+    output_directory = Path(output_directory)
+
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = output_directory / MANIFEST_NAME
+    old_manifest = load_manifest(manifest_path)
+
+    settings = [extension, format]
+
+    ### check which files must be transcoded, recording the
+    ### ones which don't in the new manifest
+
+    source_root = source_directory.resolve()
+    output_root = output_directory.resolve()
+
+    output_is_inside_source = source_root in output_root.parents
+
+    new_manifest = {}
+    jobs = []
+    excluded = 0
+
+    for source_path in get_image_paths(source_directory, recursive):
+
+        source_path = Path(source_path)
+        relative_path = source_path.relative_to(source_directory)
+
+        output_path = (
+          output_directory / relative_path.with_suffix(extension)
+        )
+
+        ## exclude files which are outputs themselves (when the
+        ## output directory is inside the source directory) or
+        ## would be replaced by their output
+
+        resolved_source_path = source_path.resolve()
+
+        if (
+          output_path.resolve() == resolved_source_path
+          or (
+            output_is_inside_source
+            and output_root in resolved_source_path.parents
+          )
+        ):
+            excluded += 1
+            continue
+
+        stat_result = source_path.stat()
+
+        entry = {
+          'mtime_ns' : stat_result.st_mtime_ns,
+          'size'     : stat_result.st_size,
+          'settings' : settings,
+        }
+
+        key = relative_path.as_posix()
+        old_entry = old_manifest.get(key, {})
+
+        known_hash = (
+          old_entry.get('hash')
+          if (
+            old_entry.get('settings') == settings
+            and output_path.exists()
+          )
+          else None
+        )
+
+        ## if the source didn't change, there's nothing to do
+
+        if (
+          known_hash is not None
+          and old_entry['mtime_ns'] == entry['mtime_ns']
+          and old_entry['size'] == entry['size']
+        ):
+
+            new_manifest[key] = old_entry
+            continue
+
+        ## otherwise, transcode it, unless its hash is known and
+        ## remains the same (this is checked by the worker)
+
+        jobs.append((key, entry, source_path, output_path, known_hash))
+
+    skipped = len(new_manifest)
+    transcoded = 0
+    errors = []
+
+    ### transcode files, storing the manifest at the end, even
+    ### if an error is raised
+
+    try:
+
+        with ProcessPoolExecutor(max_workers or None) as executor:
+
+            futures = [
+              executor.submit(
+                transcode,
+                source_path,
+                output_path,
+                format,
+                known_hash,
+              )
+              for _, _, source_path, output_path, known_hash in jobs
+            ]
+
+            ## record every file transcoded, even if others fail,
+            ## keeping the errors to raise them at the end
+
+            for (key, entry, source_path, *_), future in zip(jobs, futures):
+
+                try:
+                    source_hash, was_transcoded = future.result()
+
+                except Exception as error:
+
+                    errors.append((source_path, error))
+                    continue
+
+                entry['hash'] = source_hash
+                new_manifest[key] = entry
+
+                if was_transcoded:
+                    transcoded += 1
+
+                else:
+                    skipped += 1
+
+    finally:
+        store_manifest(manifest_path, new_manifest)
+
+    ### raise the errors, if any
+
+    if len(errors) == 1:
+        raise errors[0][1]
+
+    if errors:
+
+        raise RuntimeError(
+          f"{len(errors)} files couldn't be transcoded"
+          f" ({', '.join(str(path) for path, _ in errors)});"
+          " the first error is shown above"
+        ) from errors[0][1]
+
+    return {
+      'transcoded' : transcoded,
+      'skipped'    : skipped,
+      'excluded'   : excluded,
+    }
+
+main_callable = transcode_images
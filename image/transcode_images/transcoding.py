@@ -0,0 +1,56 @@
+"""Facility for transcoding files in worker processes.
+
+Functions in this module are run by a process pool, so they
+must be importable by the worker processes.
+"""
+
+### standard library import
+from hashlib import blake2b
+
+
+### local imports
+
+from ..open_image.loading import decode_image
+
+from ..save_image.saving import save
+
+from ..save_image.fingerprints import replacing_atomically
+
+
+### number of bytes read at once when hashing files
+HASHED_CHUNK_BYTES = 1 << 20
+
+
+def hash_file(path):
+    """Return hex digest of contents of file."""
+    hasher = blake2b(digest_size=20)
+
+    with open(path, 'rb') as file:
+
+        for chunk in iter(lambda: file.read(HASHED_CHUNK_BYTES), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def transcode(source_path, output_path, format, known_hash):
+    """Transcode file unless its contents have known_hash.
+
+    The output file is replaced atomically and its directory
+    created if needed.
+
+    Returns (hash of source file, whether it was transcoded).
+    """
+    source_hash = hash_file(source_path)
+
+    if source_hash == known_hash:
+        return source_hash, False
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    image = decode_image(source_path)
+
+    with replacing_atomically(output_path) as temp_path:
+        save(image, temp_path, format)
+
+    return source_hash, True
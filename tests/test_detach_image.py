@@ -0,0 +1,98 @@
+"""Tests for the memory used when decoding images with open_image.
+
+Images are decoded in a subprocess, whose peak resident memory
+(ru_maxrss) is compared before and after decoding, so memory
+used by the test runner doesn't affect the measurements.
+"""
+
+### standard library imports
+
+import sys
+
+from pathlib import Path
+
+from subprocess import run
+
+
+### third-party imports
+
+import pytest
+
+from PIL.Image import linear_gradient
+
+
+### the resource module is only available on Unix systems
+pytest.importorskip('resource')
+
+
+### directory containing the node packs, which must be in the
+### import path of the subprocess
+PACK_ROOT = Path(__file__).resolve().parent.parent
+
+### size of the image decoded; it is large compared to the
+### memory used by the interpreter and Pillow, so the growth
+### of the peak memory is dominated by its pixels
+IMAGE_SIZE = (6000, 6000)
+
+### script run by the subprocess, which prints the growth of its
+### peak memory, in bytes, while decoding the image, along with
+### the number of bytes of the pixels of the decoded image;
+###
+### on Linux, ru_maxrss keeps the peak of the parent process
+### across exec, so the peak of the subprocess alone is read
+### from /proc instead, when available; ru_maxrss is given in
+### kilobytes on Linux, in bytes on macOS
+
+DECODING_SCRIPT = """\
+import sys
+from resource import getrusage, RUSAGE_SELF
+from image.open_image.loading import decode_image
+
+def get_peak_memory():
+
+    try:
+
+        with open('/proc/self/status') as file:
+
+            for line in file:
+
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+
+    except OSError:
+        pass
+
+    unit = 1 if sys.platform == 'darwin' else 1024
+
+    return getrusage(RUSAGE_SELF).ru_maxrss * unit
+
+before = get_peak_memory()
+image = decode_image(sys.argv[1])
+after = get_peak_memory()
+
+print(after - before, image.width * image.height)
+"""
+
+
+def test_decoding_peak_memory_stays_near_image_size(tmp_path):
+    """Decoding must not allocate the pixels twice.
+
+    A copy of the decoded image (as Image.copy() would make)
+    doubles the peak memory; detaching the image from the file
+    shares its pixels instead.
+    """
+    filepath = tmp_path / 'gradient.png'
+
+    linear_gradient('L').resize(IMAGE_SIZE).save(filepath, compress_level=1)
+
+    result = run(
+               [sys.executable, '-c', DECODING_SCRIPT, str(filepath)],
+               cwd=PACK_ROOT,
+               capture_output=True,
+               text=True,
+               check=True,
+             )
+
+    growth, image_bytes = map(int, result.stdout.split())
+
+    assert 0.5 * image_bytes < growth < 1.5 * image_bytes
@@ -0,0 +1,193 @@
+"""Tests for decoding regions and reduced images with open_image.
+
+Regions (crop_box) of files whose pixels are split in strips are
+decoded by making Pillow read only the strips overlapping them,
+and images over the pixel budget (max_pixels) are decoded band
+by band; both rewrite the tiles and size of the image object
+Pillow returns, so the results are compared with decoding the
+whole file and then cropping or reducing it.
+
+PGM and BMP files store their pixels as a single tile, so they
+are decoded entirely instead, but must give the same results.
+"""
+
+### standard library imports
+
+import sys
+
+from pathlib import Path
+
+from random import Random
+
+
+### third-party imports
+
+import pytest
+
+from PIL.Image import frombytes, open as pil_open_image
+
+
+### make the node packs importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image.open_image.loading import decode_image
+
+from image.open_image.budget import get_reduce_factor, reduce_image
+
+
+### size of the images; the height isn't a multiple of the
+### number of rows per strip, nor of the reduction factors
+### used, so the last strip and band are shorter than the others
+IMAGE_SIZE = (301, 203)
+
+### number of rows in each strip of TIFF files
+ROWS_PER_STRIP = 16
+
+### regions compared, including ones aligned with strips, ones
+### within a single strip and ones touching the edges
+CROP_BOXES = (
+  (0, 0, 301, 203),
+  (0, 0, 301, 16),
+  (10, 20, 200, 100),
+  (50, 33, 51, 34),
+  (120, 190, 301, 203),
+  (0, 95, 301, 145),
+)
+
+### pixel budgets compared, which reduce the images by factors
+### of 2, 3 and 7
+MAX_PIXELS = (
+  151 * 102,
+  101 * 68,
+  43 * 29,
+)
+
+
+def make_image(mode):
+    """Return image of IMAGE_SIZE in mode with random pixels."""
+    width, height = IMAGE_SIZE
+
+    band_count = len(mode) if mode != 'P' else 1
+
+    data = Random(0).randbytes(width * height * band_count)
+
+    image = frombytes(mode, IMAGE_SIZE, data)
+
+    if mode == 'P':
+        image.putpalette(Random(1).randbytes(768))
+
+    return image
+
+
+def save_striped_tiff(image, filepath):
+    """Save image as uncompressed TIFF with ROWS_PER_STRIP rows per strip."""
+    image.save(filepath, tiffinfo={278: ROWS_PER_STRIP})
+
+
+def save_pgm(image, filepath):
+    """Save image as binary PGM."""
+    image.convert('L').save(filepath)
+
+
+def save_bmp(image, filepath):
+    """Save image as BMP."""
+    image.save(filepath)
+
+
+### files compared, with the function saving them and the mode
+### of the image saved
+
+FILE_CASES = (
+  ('striped.tif', save_striped_tiff, 'RGB'),
+  ('striped_l.tif', save_striped_tiff, 'L'),
+  ('striped_p.tif', save_striped_tiff, 'P'),
+  ('image.pgm', save_pgm, 'L'),
+  ('image.bmp', save_bmp, 'RGB'),
+  ('image_p.bmp', save_bmp, 'P'),
+)
+
+
+@pytest.fixture(params=FILE_CASES, ids=lambda case: case[0])
+def filepath(request, tmp_path):
+    """Return path of file saved for the case."""
+    name, save, mode = request.param
+
+    filepath = tmp_path / name
+    save(make_image(mode), filepath)
+
+    return filepath
+
+
+def decode_whole_file(filepath):
+    """Return image decoded from whole file by Pillow alone."""
+    with pil_open_image(filepath) as image:
+
+        image.load()
+        return image.copy()
+
+
+def assert_same_image(image, expected_image):
+    """Check that images have the same mode, size and pixels."""
+    assert image.mode == expected_image.mode
+    assert image.size == expected_image.size
+    assert image.tobytes() == expected_image.tobytes()
+
+    if image.mode == 'P':
+        assert image.getpalette() == expected_image.getpalette()
+
+
+def test_striped_tiff_files_have_several_strips(tmp_path):
+    """The TIFF files must exercise the decoding of strips."""
+    filepath = tmp_path / 'striped.tif'
+    save_striped_tiff(make_image('RGB'), filepath)
+
+    with pil_open_image(filepath) as image:
+        assert len(image.tile) > 1
+
+
+@pytest.mark.parametrize('crop_box', CROP_BOXES)
+def test_crop_box_matches_cropping_whole_image(filepath, crop_box):
+    """Decoding a region must give the crop of the whole image."""
+    expected_image = decode_whole_file(filepath).crop(crop_box)
+
+    assert_same_image(decode_image(filepath, crop_box=crop_box), expected_image)
+
+
+@pytest.mark.parametrize('max_pixels', MAX_PIXELS)
+def test_max_pixels_matches_reducing_whole_image(filepath, max_pixels):
+    """Decoding within a budget must give the reduced whole image."""
+    whole_image = decode_whole_file(filepath)
+
+    factor = get_reduce_factor(whole_image.size, max_pixels)
+    assert factor > 1
+
+    expected_image = reduce_image(whole_image, factor)
+
+    image = decode_image(filepath, max_pixels=max_pixels)
+
+    assert image.width * image.height <= max_pixels
+    assert_same_image(image, expected_image)
+
+
+@pytest.mark.parametrize('max_pixels', MAX_PIXELS)
+@pytest.mark.parametrize('crop_box', CROP_BOXES[2:4] + CROP_BOXES[5:])
+def test_crop_box_and_max_pixels_match_whole_image(
+      filepath,
+      crop_box,
+      max_pixels,
+    ):
+    """Decoding a region within a budget must give the reduced crop."""
+    region = decode_whole_file(filepath).crop(crop_box)
+
+    factor = get_reduce_factor(region.size, max_pixels)
+
+    expected_image = (
+      reduce_image(region, factor)
+      if factor > 1
+      else region
+    )
+
+    assert_same_image(
+      decode_image(filepath, crop_box=crop_box, max_pixels=max_pixels),
+      expected_image,
+    )